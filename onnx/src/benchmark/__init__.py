@@ -0,0 +1,3 @@
+from draive import load_env
+
+load_env()
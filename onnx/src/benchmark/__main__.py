@@ -0,0 +1,124 @@
+import argparse
+import json
+from asyncio import run
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, cast
+
+from draive import ctx, setup_logging
+from tokenizers import Tokenizer
+
+from benchmark.corpus import CorpusDistribution, generate_corpus
+from benchmark.runner import BenchmarkSweep, run_benchmark
+from integrations.onnx.tokenization import load_tokenizer
+
+
+async def benchmark(  # noqa: PLR0913
+    model_path: Path,
+    /,
+    *,
+    corpus_size: int,
+    distribution: CorpusDistribution,
+    seed: int,
+    sweep: BenchmarkSweep,
+    execution_provider: str,
+    output_path: Path | None,
+) -> None:
+    async with ctx.scope("benchmark"):
+        corpus: Sequence[str] = generate_corpus(
+            size=corpus_size,
+            distribution=distribution,
+            seed=seed,
+        )
+        # count tokens the model actually processes, texts are truncated to its max length
+        tokenizer: Tokenizer = load_tokenizer(model_path.parent, window_overlap=0)
+        tokens: int = sum(len(encoding.ids) for encoding in tokenizer.encode_batch(list(corpus)))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+
+        results: Sequence[dict[str, Any]] = await run_benchmark(
+            model_path,
+            corpus=corpus,
+            tokens=tokens,
+            sweep=sweep,
+            execution_provider=execution_provider,
+        )
+        report: dict[str, Any] = {
+            "model": str(model_path),
+            "execution_provider": execution_provider,
+            "corpus": {
+                "size": corpus_size,
+                "distribution": distribution,
+                "seed": seed,
+                "tokens": tokens,
+            },
+            "results": results,
+        }
+
+        if output_path is not None:
+            with open(output_path, "w") as file:
+                json.dump(report, file, indent=2)
+
+        print(json.dumps(report, indent=2))
+
+
+def _integers(value: str) -> Sequence[int]:
+    return tuple(int(element) for element in value.split(","))
+
+
+def _booleans(value: str) -> Sequence[bool]:
+    return tuple(element.strip().lower() in ("1", "true", "yes") for element in value.split(","))
+
+
+def _strings(value: str) -> Sequence[str]:
+    return tuple(element.strip() for element in value.split(","))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure onnx embedding model throughput for a sweep of settings",
+    )
+    parser.add_argument(
+        "model_path",
+        type=Path,
+        help="Path to the model.onnx file, tokenizer files are expected next to it",
+    )
+    parser.add_argument("--corpus-size", type=int, default=1024)
+    parser.add_argument(
+        "--distribution",
+        choices=("short", "long", "mixed", "lognormal"),
+        default="mixed",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-sizes", type=_integers, default=(8, 32, 64))
+    parser.add_argument("--length-bucketing", type=_booleans, default=(False, True))
+    parser.add_argument("--intra-op-threads", type=_integers, default=(0,))
+    parser.add_argument("--inter-op-threads", type=_integers, default=(0,))
+    parser.add_argument("--execution-modes", type=_strings, default=("sequential",))
+    parser.add_argument("--graph-optimizations", type=_strings, default=("all",))
+    parser.add_argument("--request-size", type=int, default=32)
+    parser.add_argument("--execution-provider", default="CPUExecutionProvider")
+    parser.add_argument("--output", type=Path, default=None)
+    arguments = parser.parse_args()
+
+    setup_logging("benchmark")
+    run(
+        benchmark(
+            arguments.model_path,
+            corpus_size=arguments.corpus_size,
+            distribution=arguments.distribution,
+            seed=arguments.seed,
+            sweep=BenchmarkSweep(
+                batch_sizes=arguments.batch_sizes,
+                length_bucketing=arguments.length_bucketing,
+                intra_op_threads=arguments.intra_op_threads,
+                inter_op_threads=arguments.inter_op_threads,
+                execution_modes=cast(Any, arguments.execution_modes),
+                graph_optimizations=cast(Any, arguments.graph_optimizations),
+                request_size=arguments.request_size,
+            ),
+            execution_provider=arguments.execution_provider,
+            output_path=arguments.output,
+        )
+    )
+
+
+main()
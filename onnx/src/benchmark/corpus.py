@@ -0,0 +1,57 @@
+from collections.abc import Sequence
+from typing import Literal
+
+import numpy as np
+
+__all__ = (
+    "CorpusDistribution",
+    "generate_corpus",
+)
+
+
+type CorpusDistribution = Literal[
+    "short",
+    "long",
+    "mixed",
+    "lognormal",
+]
+
+_VOCABULARY: Sequence[str] = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut"
+    " labore et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco"
+    " laboris nisi aliquip ex ea commodo consequat duis aute irure in reprehenderit voluptate"
+    " velit esse cillum fugiat nulla pariatur excepteur sint occaecat cupidatat non proident"
+    " sunt culpa qui officia deserunt mollit anim id est laborum"
+).split()
+
+
+def generate_corpus(
+    *,
+    size: int,
+    distribution: CorpusDistribution,
+    seed: int,
+) -> Sequence[str]:
+    # generated deterministically to keep results comparable between runs and hosts
+    generator: np.random.Generator = np.random.default_rng(seed)
+    lengths: np.ndarray
+    match distribution:
+        case "short":  # search queries
+            lengths = generator.integers(3, 24, size=size)
+
+        case "long":  # document chunks
+            lengths = generator.integers(160, 400, size=size)
+
+        case "mixed":  # queries mixed with documents
+            lengths = np.where(
+                generator.random(size=size) < 0.8,  # noqa: PLR2004
+                generator.integers(3, 24, size=size),
+                generator.integers(160, 400, size=size),
+            )
+
+        case "lognormal":  # long tailed lengths of real world texts
+            lengths = np.clip(generator.lognormal(mean=3.5, sigma=1.0, size=size), 1, 2048)
+
+    words: np.ndarray = np.asarray(_VOCABULARY)
+    return tuple(
+        " ".join(generator.choice(words, size=int(length)).tolist()) for length in lengths
+    )
@@ -0,0 +1,201 @@
+import resource
+import sys
+from asyncio import get_running_loop, run
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Literal
+
+import numpy as np
+import onnxruntime as onnx
+from draive import State, ctx
+
+from integrations.onnx import ONNXEmbeddingConfig, ONNXEmbeddingModel, ONNXSessionOptions
+
+__all__ = (
+    "BenchmarkSweep",
+    "run_benchmark",
+)
+
+
+type ExecutionMode = Literal["sequential", "parallel"]
+type GraphOptimization = Literal["disable", "basic", "extended", "all"]
+
+
+class BenchmarkSweep(State):
+    batch_sizes: Sequence[int] = (32,)
+    length_bucketing: Sequence[bool] = (False,)
+    intra_op_threads: Sequence[int] = (0,)
+    inter_op_threads: Sequence[int] = (0,)
+    execution_modes: Sequence[ExecutionMode] = ("sequential",)
+    graph_optimizations: Sequence[GraphOptimization] = ("all",)
+    request_size: int = 32
+
+
+async def run_benchmark(
+    model_path: Path,
+    /,
+    *,
+    corpus: Sequence[str],
+    tokens: int,
+    sweep: BenchmarkSweep,
+    execution_provider: str,
+) -> Sequence[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for (
+        batch_size,
+        length_bucketing,
+        intra_op_threads,
+        inter_op_threads,
+        execution_mode,
+        graph_optimization,
+    ) in product(
+        sweep.batch_sizes,
+        sweep.length_bucketing,
+        sweep.intra_op_threads,
+        sweep.inter_op_threads,
+        sweep.execution_modes,
+        sweep.graph_optimizations,
+    ):
+        settings: dict[str, Any] = {
+            "batch_size": batch_size,
+            "length_bucketing": length_bucketing,
+            "intra_op_threads": intra_op_threads,
+            "inter_op_threads": inter_op_threads,
+            "execution_mode": execution_mode,
+            "graph_optimization": graph_optimization,
+            "request_size": sweep.request_size,
+        }
+        ctx.log_info(f"Benchmarking {settings}...")
+        # each configuration runs in a fresh process, peak memory of previous ones is not carried
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context("spawn"),
+        ) as executor:
+            metrics: dict[str, Any] = await get_running_loop().run_in_executor(
+                executor,
+                _measure_in_process,
+                str(model_path),
+                corpus,
+                tokens,
+                settings,
+                execution_provider,
+            )
+
+        ctx.log_info(f"...{metrics['texts_per_second']:.1f} texts/s")
+        results.append({**settings, **metrics})
+
+    return results
+
+
+def _measure_in_process(
+    model_path: str,
+    corpus: Sequence[str],
+    tokens: int,
+    settings: dict[str, Any],
+    execution_provider: str,
+) -> dict[str, Any]:
+    async def measure() -> dict[str, Any]:
+        async with ctx.scope("benchmark_run"):
+            return await _measure(
+                ONNXEmbeddingModel(
+                    model_path,
+                    execution_provider=execution_provider,
+                    session_options=_session_options(
+                        intra_op_threads=settings["intra_op_threads"],
+                        inter_op_threads=settings["inter_op_threads"],
+                        execution_mode=settings["execution_mode"],
+                        graph_optimization=settings["graph_optimization"],
+                    ),
+                ),
+                corpus=corpus,
+                tokens=tokens,
+                config=ONNXEmbeddingConfig(
+                    batch_size=settings["batch_size"],
+                    length_bucketing=settings["length_bucketing"],
+                ),
+                request_size=settings["request_size"],
+            )
+
+    return run(measure())
+
+
+async def _measure(
+    model: ONNXEmbeddingModel,
+    /,
+    *,
+    corpus: Sequence[str],
+    tokens: int,
+    config: ONNXEmbeddingConfig,
+    request_size: int,
+) -> dict[str, Any]:
+    async with model:
+        await model.embed_texts(corpus[:request_size], config=config)  # warm up
+
+        latencies: list[float] = []
+        started: float = perf_counter()
+        for offset in range(0, len(corpus), request_size):
+            request_started: float = perf_counter()
+            await model.embed_texts(
+                corpus[offset : offset + request_size],
+                config=config,
+            )
+            latencies.append(perf_counter() - request_started)
+
+        duration: float = perf_counter() - started
+
+    return {
+        "duration_s": duration,
+        "latency_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "latency_p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "texts_per_second": len(corpus) / duration,
+        "tokens_per_second": tokens / duration,
+        # measured in a process dedicated to this configuration
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _session_options(
+    *,
+    intra_op_threads: int,
+    inter_op_threads: int,
+    execution_mode: ExecutionMode,
+    graph_optimization: GraphOptimization,
+) -> ONNXSessionOptions:  # pyright: ignore[reportUnknownParameterType]
+    options = onnx.SessionOptions()  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    match execution_mode:
+        case "sequential":
+            options.execution_mode = onnx.ExecutionMode.ORT_SEQUENTIAL  # pyright: ignore
+
+        case "parallel":
+            options.execution_mode = onnx.ExecutionMode.ORT_PARALLEL  # pyright: ignore
+
+    match graph_optimization:
+        case "disable":
+            options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_DISABLE_ALL  # pyright: ignore
+
+        case "basic":
+            options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_ENABLE_BASIC  # pyright: ignore
+
+        case "extended":
+            options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_ENABLE_EXTENDED  # pyright: ignore
+
+        case "all":
+            options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_ENABLE_ALL  # pyright: ignore
+
+    options.log_severity_level = 3
+    return options  # pyright: ignore[reportUnknownVariableType]
+
+
+def _peak_rss_mb() -> float:
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # reported in bytes on macOS
+        return peak / (1024 * 1024)
+
+    else:  # reported in kilobytes on linux
+        return peak / 1024
@@ -1,14 +1,33 @@
 from integrations.onnx.embedding import ONNXEmbeddingConfig, ONNXEmbeddingModel
+from integrations.onnx.images import ONNXImageEmbeddingConfig, ONNXImageEmbeddingModel
+from integrations.onnx.processes import ONNXEmbeddingProcessPool
+from integrations.onnx.registry import ONNXSessionRegistry
+from integrations.onnx.reranking import ONNXRerankerConfig, ONNXRerankerModel, ONNXReranking
 from integrations.onnx.types import (
+    ONNXEmbeddingPooling,
     ONNXExcetion,
     ONNXExecutionProvider,
+    ONNXLongTextStrategy,
+    ONNXOverloaded,
+    ONNXPassagesScoring,
     ONNXSessionOptions,  # pyright: ignore[reportUnknownVariableType]
 )
 
 __all__ = (
     "ONNXEmbeddingConfig",
     "ONNXEmbeddingModel",
+    "ONNXEmbeddingPooling",
+    "ONNXEmbeddingProcessPool",
     "ONNXExcetion",
     "ONNXExecutionProvider",
+    "ONNXImageEmbeddingConfig",
+    "ONNXImageEmbeddingModel",
+    "ONNXLongTextStrategy",
+    "ONNXOverloaded",
+    "ONNXPassagesScoring",
+    "ONNXRerankerConfig",
+    "ONNXRerankerModel",
+    "ONNXReranking",
     "ONNXSessionOptions",
+    "ONNXSessionRegistry",
 )
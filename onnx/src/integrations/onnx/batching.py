@@ -0,0 +1,48 @@
+from collections.abc import Sequence
+
+__all__ = ("prepare_batches",)
+
+
+def prepare_batches(
+    lengths: Sequence[int],
+    /,
+    *,
+    batch_size: int,
+    max_batch_tokens: int | None,
+    length_bucketing: bool,
+) -> Sequence[Sequence[int]]:
+    assert batch_size > 0  # nosec: B101
+    assert max_batch_tokens is None or max_batch_tokens > 0  # nosec: B101
+
+    indices: Sequence[int]
+    if length_bucketing:  # group elements of similar length to minimize padding
+        indices = sorted(range(len(lengths)), key=lengths.__getitem__)
+
+    else:
+        indices = range(len(lengths))
+
+    batches: list[Sequence[int]] = []
+    current_batch: list[int] = []
+    current_length: int = 0
+    for index in indices:
+        length: int = lengths[index]
+        batch_length: int = max(current_length, length)
+        # limit both batch rows and padded tokens (rows * longest element)
+        if current_batch and (
+            len(current_batch) >= batch_size
+            or (
+                max_batch_tokens is not None
+                and batch_length * (len(current_batch) + 1) > max_batch_tokens
+            )
+        ):
+            batches.append(current_batch)
+            current_batch = []
+            batch_length = length
+
+        current_batch.append(index)
+        current_length = batch_length
+
+    if current_batch:
+        batches.append(current_batch)
+
+    return batches
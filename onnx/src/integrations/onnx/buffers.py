@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from threading import Lock
+
+import numpy as np
+
+__all__ = (
+    "ONNXBufferPool",
+    "bucket_size",
+)
+
+
+type NumpyArray = np.ndarray
+
+
+def bucket_size(
+    size: int,
+    /,
+    *,
+    granularity: int,
+) -> int:
+    assert granularity > 0  # nosec: B101
+    # round up so that similar sizes share the same buffers
+    return max(granularity, -(-size // granularity) * granularity)
+
+
+class ONNXBufferPool:
+    __slots__ = (
+        "_free",
+        "_free_bytes",
+        "_lock",
+        "_max_free_bytes",
+        "_max_free_per_shape",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_free_per_shape: int = 4,
+        max_free_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        assert max_free_per_shape > 0  # nosec: B101
+        assert max_free_bytes > 0  # nosec: B101
+        # free buffers by shape, ordered from the least recently used shape
+        self._free: OrderedDict[Hashable, list[NumpyArray]] = OrderedDict()
+        self._free_bytes: int = 0
+        self._max_free_per_shape: int = max_free_per_shape
+        self._max_free_bytes: int = max_free_bytes
+        # buffers are acquired and released from worker threads running the model
+        self._lock: Lock = Lock()
+
+    def acquire(
+        self,
+        shape: tuple[int, ...],
+        /,
+        *,
+        dtype: type[np.generic],
+    ) -> NumpyArray:
+        key: Hashable = (shape, np.dtype(dtype))
+        with self._lock:
+            if free := self._free.get(key):
+                self._free.move_to_end(key)
+                buffer: NumpyArray = free.pop()
+                self._free_bytes -= buffer.nbytes
+                return buffer
+
+        return np.empty(shape, dtype=dtype)
+
+    def release(
+        self,
+        *buffers: NumpyArray,
+    ) -> None:
+        with self._lock:
+            for buffer in buffers:
+                key: Hashable = (buffer.shape, buffer.dtype)
+                free: list[NumpyArray] = self._free.setdefault(key, [])
+                self._free.move_to_end(key)
+                if len(free) >= self._max_free_per_shape:
+                    continue  # enough buffers of that shape are kept already
+
+                free.append(buffer)
+                self._free_bytes += buffer.nbytes
+
+            # keep memory bounded, buffers of shapes not used recently are dropped first
+            while self._free_bytes > self._max_free_bytes:
+                oldest_key, oldest = next(iter(self._free.items()))
+                if oldest:
+                    self._free_bytes -= oldest.pop().nbytes
+
+                if not oldest:
+                    del self._free[oldest_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._free.clear()
+            self._free_bytes = 0
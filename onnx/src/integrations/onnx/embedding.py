@@ -1,19 +1,30 @@
-import json
-from asyncio import Lock, to_thread
+from asyncio import to_thread
 from collections.abc import Callable, Sequence
-from itertools import chain
 from pathlib import Path
+from time import perf_counter
 from types import TracebackType
 from typing import Any, cast, override
 
 import numpy as np
 from draive import DataModel, Embedded, State, TextEmbedding, as_list
 from haiway import ctx
-from tokenizers import AddedToken, Encoding, Tokenizer
+from tokenizers import Encoding, Tokenizer
 
+from integrations.onnx.microbatching import MicroBatcher
 from integrations.onnx.model import ONNXModel
+from integrations.onnx.pooling import combine_windows, normalize_embeddings, pool_embeddings
+from integrations.onnx.registry import ONNXSessionRegistry
+from integrations.onnx.tokenization import (
+    acquire_inputs,
+    load_pad_token_id,
+    load_sequence_length,
+    load_tokenizer,
+    prepare_encodings_inputs,
+)
 from integrations.onnx.types import (
+    ONNXEmbeddingPooling,
     ONNXExecutionProvider,
+    ONNXLongTextStrategy,
     ONNXSessionOptions,  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
 )
 
@@ -28,16 +39,26 @@ type NumpyArray = np.ndarray
 
 class ONNXEmbeddingConfig(State):
     batch_size: int = 32
+    max_batch_tokens: int | None = None
+    length_bucketing: bool = False
+    pooling: ONNXEmbeddingPooling = "cls"
+    normalize: bool = False
+    long_texts: ONNXLongTextStrategy = "truncate"
+    dimensions: int | None = None
 
 
 class ONNXEmbeddingModel(ONNXModel):
     __slots__ = (
-        "_session_lock",
+        "_max_length",
+        "_micro_batcher",
+        "_pad_token_id",
         "_tokenizer",
         "_tokenizer_path",
+        "_warm_up_texts",
+        "_window_overlap",
     )
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         model_path: Path | str,
         /,
@@ -45,11 +66,30 @@ class ONNXEmbeddingModel(ONNXModel):
         tokenizer_path: Path | str | None = None,
         execution_provider: ONNXExecutionProvider,
         session_options: ONNXSessionOptions | None = None,  # pyright: ignore[reportUnknownParameterType]
+        optimized: bool = False,
+        concurrent_runs: int | None = None,
+        max_pending_runs: int | None = None,
+        micro_batch_wait_ms: float | None = None,
+        micro_batch_size: int = 64,
+        window_overlap: int = 32,
+        lazy: bool = False,
+        idle_ttl: float | None = None,
+        sessions: ONNXSessionRegistry | None = None,
+        warm_up_texts: Sequence[str] | None = None,
+        io_binding: bool = False,
     ) -> None:
+        assert window_overlap >= 0  # nosec: B101
         super().__init__(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
             model_path,
             execution_provider=execution_provider,
             session_options=session_options,
+            optimized=optimized,
+            concurrent_runs=concurrent_runs,
+            max_pending_runs=max_pending_runs,
+            lazy=lazy,
+            idle_ttl=idle_ttl,
+            sessions=sessions,
+            io_binding=io_binding,
         )
 
         self._tokenizer_path: Path
@@ -69,55 +109,87 @@ class ONNXEmbeddingModel(ONNXModel):
                 self._tokenizer_path = path
 
         self._tokenizer: Tokenizer
-        self._session_lock: Lock = Lock()
+        self._pad_token_id: int
+        self._max_length: int | None
+        # number of tokens shared by consecutive windows of texts exceeding max length
+        self._window_overlap: int = window_overlap
+        # texts embedded right after loading so first requests do not pay for it
+        self._warm_up_texts: Sequence[str] = warm_up_texts or ()
+        # collect concurrent requests into shared model batches when enabled
+        self._micro_batcher: MicroBatcher[str, ONNXEmbeddingConfig, NumpyArray] | None
+        if micro_batch_wait_ms is not None:
+            self._micro_batcher = MicroBatcher(
+                self._embed_texts_batched,
+                max_wait_ms=micro_batch_wait_ms,
+                max_batch_size=micro_batch_size,
+            )
+
+        else:
+            self._micro_batcher = None
 
     @override
     def _initialize_session(self) -> None:
         super()._initialize_session()
-        self._tokenizer = _load_tokenizer(self._tokenizer_path)
+        self._tokenizer = load_tokenizer(
+            self._tokenizer_path,
+            window_overlap=self._window_overlap,
+        )
+        self._pad_token_id = load_pad_token_id(self._tokenizer_path)
+        self._max_length = load_sequence_length(self._tokenizer)
+
+    @override
+    async def _warm_up(self) -> None:
+        if not self._warm_up_texts:
+            return  # warm up disabled
+
+        ctx.log_info(f"Warming up onnx model {self._model_path}")
+        await self._embed_texts_batched(
+            self._warm_up_texts,
+            ctx.state(ONNXEmbeddingConfig),
+        )
 
     async def __aenter__(self) -> TextEmbedding:
-        async with self._session_lock:
-            self._initialize_session()
-
-            async def create_texts_embedding[Value: DataModel | State](
-                values: Sequence[Value] | Sequence[str],
-                /,
-                attribute: Callable[[Value], str] | None = None,
-                *,
-                config: ONNXEmbeddingConfig | None = None,
-                **extra: Any,
-            ) -> Sequence[Embedded[Value]] | Sequence[Embedded[str]]:
-                embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
-                attributes: list[str]
-                if attribute is None:
-                    attributes = cast(list[str], as_list(values))
+        await self._enter_scope()
+
+        async def create_texts_embedding[Value: DataModel | State](
+            values: Sequence[Value] | Sequence[str],
+            /,
+            attribute: Callable[[Value], str] | None = None,
+            *,
+            config: ONNXEmbeddingConfig | None = None,
+            **extra: Any,
+        ) -> Sequence[Embedded[Value]] | Sequence[Embedded[str]]:
+            embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+            attributes: list[str]
+            if attribute is None:
+                attributes = cast(list[str], as_list(values))
 
-                else:
-                    attributes = [attribute(cast(Value, value)) for value in values]
+            else:
+                attributes = [attribute(cast(Value, value)) for value in values]
 
-                assert all(isinstance(element, str) for element in attributes)  # nosec: B101
+            assert all(isinstance(element, str) for element in attributes)  # nosec: B101
 
-                embeddings: Sequence[Sequence[float]] = await self.embed_texts(
-                    attributes,
-                    batch_size=embedding_config.batch_size,
-                )
-                return cast(
-                    Sequence[Embedded[Value]] | Sequence[Embedded[str]],
-                    [
-                        Embedded(
-                            value=value,
-                            vector=embedding,
-                        )
-                        for value, embedding in zip(
-                            values,
-                            embeddings,
-                            strict=True,
-                        )
-                    ],
-                )
+            embeddings: NumpyArray = await self.embed_texts(
+                attributes,
+                config=embedding_config,
+            )
+            # Embedded requires sequences of floats, convert all vectors at once
+            return cast(
+                Sequence[Embedded[Value]] | Sequence[Embedded[str]],
+                [
+                    Embedded(
+                        value=value,
+                        vector=embedding,
+                    )
+                    for value, embedding in zip(
+                        values,
+                        embeddings.tolist(),
+                        strict=True,
+                    )
+                ],
+            )
 
-            return TextEmbedding(embedding=create_texts_embedding)
+        return TextEmbedding(embedding=create_texts_embedding)
 
     async def __aexit__(
         self,
@@ -125,6 +197,12 @@ class ONNXEmbeddingModel(ONNXModel):
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
+        if not self._exit_scope():
+            return  # still used by other scopes
+
+        if self._micro_batcher is not None:
+            await self._micro_batcher.close()
+
         self._deinitialize_session()
 
     async def embed_texts(
@@ -132,140 +210,351 @@ class ONNXEmbeddingModel(ONNXModel):
         texts: Sequence[str],
         /,
         *,
-        batch_size: int,
-    ) -> Sequence[Sequence[float]]:
-        async with ctx.scope("text_embedding"):
-            async with self._session_lock:
-                return await to_thread(
-                    self._embed_texts,
-                    texts,
-                    batch_size=batch_size,
-                )
+        config: ONNXEmbeddingConfig | None = None,
+    ) -> NumpyArray:
+        await self._load_session()
+        embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+        if self._micro_batcher is not None:
+            return await self._micro_batcher.process(
+                texts,
+                config=embedding_config,
+            )
 
-    def _embed_texts(
+        else:
+            return await self._embed_texts_batched(
+                texts,
+                embedding_config,
+            )
+
+    async def embed_tokens(
         self,
-        texts: Sequence[str],
+        input_ids: NumpyArray,
+        attention_mask: NumpyArray,
         /,
         *,
-        batch_size: int,
-    ) -> Sequence[Sequence[float]]:
-        return tuple(
-            chain.from_iterable(
-                self._embed_texts_batch(texts[idx : idx + batch_size])
-                for idx in range(0, len(texts), batch_size)
+        config: ONNXEmbeddingConfig | None = None,
+    ) -> NumpyArray:
+        assert input_ids.shape == attention_mask.shape  # nosec: B101
+        await self._load_session()
+        embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+        lengths: NumpyArray = attention_mask.sum(axis=1)
+
+        def prepare_inputs(batch: Sequence[int]) -> tuple[NumpyArray, NumpyArray]:
+            # skip columns which are padding for all rows of the batch
+            sequence_length: int = int(lengths[batch].max())
+            if self._buffers is not None:
+                batch_input_ids, batch_attention_mask = acquire_inputs(
+                    self._buffers,
+                    rows=len(batch),
+                    sequence_length=sequence_length,
+                    pad_token_id=self._pad_token_id,
+                    max_length=self._max_length,
+                )
+                # copy rows one by one to avoid temporary arrays of fancy indexing
+                for row, index in enumerate(batch):
+                    batch_input_ids[row, :sequence_length] = input_ids[index, :sequence_length]
+                    batch_attention_mask[row, :sequence_length] = attention_mask[
+                        index, :sequence_length
+                    ]
+
+                return (batch_input_ids, batch_attention_mask)
+
+            return (
+                input_ids[batch, :sequence_length].astype(np.int64, copy=False),
+                attention_mask[batch, :sequence_length].astype(np.int64, copy=False),
             )
-        )
 
-    def _embed_texts_batch(
+        async with ctx.scope("text_embedding"):
+            return await self._embed_batches(
+                lengths.tolist(),
+                prepare_inputs=prepare_inputs,
+                config=embedding_config,
+            )
+
+    async def embed_text_chunks(
         self,
         texts: Sequence[str],
         /,
-    ) -> Sequence[Sequence[float]]:
-        try:
-            # Encode all texts in the batch
-            encodings: list[Encoding] = self._tokenizer.encode_batch(texts)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
-            # Prepare batch inputs
-            input_ids = np.array([encoding.ids for encoding in encodings])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
-            onnx_input: dict[str, np.ndarray] = {
-                "input_ids": np.array(input_ids, dtype=np.int64),
-            }
-            # Add attention mask if needed
-            if "attention_mask" in self.input_names:
-                onnx_input["attention_mask"] = np.array(
-                    np.array([encoding.attention_mask for encoding in encodings]),  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
-                    dtype=np.int64,
-                )
-            # Add token type ids if needed
-            if "token_type_ids" in self.input_names:
-                onnx_input["token_type_ids"] = np.zeros_like(input_ids, dtype=np.int64)
-            # Run the model
-            model_output: Sequence[Any] = self._run(input_feed=onnx_input)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
-            embeddings = model_output[0]
-            # Process embeddings based on their shape
-            if embeddings.ndim == 3:  # (batch_size, seq_len, embedding_dim)  # noqa: PLR2004
-                processed_embeddings = embeddings[:, 0]  # Take the [CLS] token embedding
-
-            elif embeddings.ndim == 2:  # (batch_size, embedding_dim)  # noqa: PLR2004
-                processed_embeddings = embeddings
-
-            else:
-                raise ValueError(f"Unsupported embedding shape: {embeddings.shape}")
+        *,
+        config: ONNXEmbeddingConfig | None = None,
+    ) -> Sequence[tuple[NumpyArray, NumpyArray]]:
+        await self._load_session()
+        embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+        if not texts:
+            return ()
 
+        async with ctx.scope("text_embedding"):
+            encodings: Sequence[Encoding] = await to_thread(self._tokenize_texts, texts)
+            windows, starts = _encoding_windows(encodings)
+            embeddings: NumpyArray = await self._embed_encodings(
+                windows,
+                config=embedding_config,
+            )
+            ends: Sequence[int] = (*starts[1:], len(windows))
+            # character offsets of each window within its text with matching vectors
             return tuple(
-                embedding.tolist() for embedding in processed_embeddings.astype(np.float32)
+                (
+                    np.array(
+                        [_window_offsets(window) for window in windows[start:end]],
+                        dtype=np.int64,
+                    ),
+                    embeddings[start:end],
+                )
+                for start, end in zip(starts, ends, strict=True)
             )
 
-        except Exception as e:
-            raise RuntimeError(f"Text embedding failed: {e}") from e
+    async def tokenize_texts(
+        self,
+        texts: Sequence[str],
+        /,
+    ) -> tuple[NumpyArray, NumpyArray]:
+        await self._load_session()
+        encodings: Sequence[Encoding] = await to_thread(self._tokenize_texts, texts)
+        return await to_thread(
+            prepare_encodings_inputs,
+            encodings,
+            pad_token_id=self._pad_token_id,
+        )
 
+    async def _embed_texts_batched(
+        self,
+        texts: Sequence[str],
+        config: ONNXEmbeddingConfig,
+        /,
+    ) -> NumpyArray:
+        async with ctx.scope("text_embedding"):
+            embedding_start: float = perf_counter()
+            # Tokenization does not occupy the inference slot
+            encodings: Sequence[Encoding] = await to_thread(self._tokenize_texts, texts)
+            ctx.record_info(
+                metric="onnx.embedding.tokenization.duration",
+                value=perf_counter() - embedding_start,
+                unit="s",
+                kind="histogram",
+            )
+            embeddings: NumpyArray = await self._embed_tokenized(
+                encodings,
+                config=config,
+            )
+            embedding_duration: float = perf_counter() - embedding_start
+            ctx.record_info(
+                metric="onnx.embedding.texts",
+                value=len(texts),
+                kind="counter",
+            )
+            if embedding_duration > 0:
+                ctx.record_info(
+                    metric="onnx.embedding.throughput",
+                    value=len(texts) / embedding_duration,
+                    unit="text/s",
+                    kind="histogram",
+                )
 
-def _load_tokenizer_special_tokens(model_dir: Path) -> dict[str, Any] | None:
-    tokens_map_path = model_dir / "special_tokens_map.json"
-    if not tokens_map_path.exists():
-        return None
+            return embeddings
 
-    with open(str(tokens_map_path)) as file:
-        tokens_map: dict[str, Any] = json.load(file)
-        return tokens_map
+    async def _embed_tokenized(
+        self,
+        encodings: Sequence[Encoding],
+        /,
+        *,
+        config: ONNXEmbeddingConfig,
+    ) -> NumpyArray:
+        match config.long_texts:
+            case "truncate":
+                return await self._embed_encodings(
+                    encodings,
+                    config=config,
+                )
 
+            case strategy:
+                # embed all windows of all texts in shared batches
+                windows, starts = _encoding_windows(encodings)
+                embeddings: NumpyArray = await self._embed_encodings(
+                    windows,
+                    config=config,
+                )
+                if len(windows) == len(encodings):
+                    return embeddings  # none of texts was split
 
-def _load_pad_token_id(model_dir: Path) -> int:
-    config_path = model_dir / "config.json"
-    if not config_path.exists():
-        raise ValueError(f"Missing config.json at {model_dir}")
+                combined: NumpyArray = combine_windows(
+                    embeddings,
+                    starts=starts,
+                    strategy=strategy,
+                )
+                if config.normalize:
+                    normalize_embeddings(combined)
 
-    with open(str(config_path)) as file:
-        config: dict[str, Any] = json.load(file)
-        return config.get("pad_token_id", 0)
+                return combined
 
+    async def _embed_encodings(
+        self,
+        encodings: Sequence[Encoding],
+        /,
+        *,
+        config: ONNXEmbeddingConfig,
+    ) -> NumpyArray:
+        return await self._embed_batches(
+            [len(encoding.ids) for encoding in encodings],  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+            prepare_inputs=lambda batch: prepare_encodings_inputs(
+                [encodings[index] for index in batch],
+                pad_token_id=self._pad_token_id,
+                buffers=self._buffers,
+                max_length=self._max_length,
+            ),
+            config=config,
+        )
 
-def _load_tokenizer_config(model_dir: Path) -> tuple[int, str]:
-    config_path = model_dir / "tokenizer_config.json"
-    if not config_path.exists():
-        raise ValueError(f"Missing tokenizer_config.json at {model_dir}")
+    def _tokenize_texts(
+        self,
+        texts: Sequence[str],
+        /,
+    ) -> Sequence[Encoding]:
+        # Encode all texts at once, padding is applied per batch
+        return self._tokenizer.encode_batch(list(texts))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
 
-    with open(str(config_path)) as file:
-        tokenizer_config: dict[str, Any] = json.load(file)
-        if "model_max_length" not in tokenizer_config:
-            return (
-                tokenizer_config["max_length"],
-                tokenizer_config["pad_token"],
+    async def _embed_batches(
+        self,
+        lengths: Sequence[int],
+        /,
+        *,
+        prepare_inputs: Callable[[Sequence[int]], tuple[NumpyArray, NumpyArray]],
+        config: ONNXEmbeddingConfig,
+    ) -> NumpyArray:
+        if not lengths:
+            return np.empty((0, 0), dtype=np.float32)
+
+        def record_batch(
+            batch: Sequence[int],
+            inputs: tuple[NumpyArray, ...],
+        ) -> None:
+            tokens: int = sum(lengths[index] for index in batch)
+            padded_tokens: int = inputs[0].size
+            ctx.record_info(
+                metric="onnx.embedding.batch.size",
+                value=len(batch),
+                kind="histogram",
             )
-
-        elif "max_length" not in tokenizer_config:
-            return (
-                tokenizer_config["model_max_length"],
-                tokenizer_config["pad_token"],
+            ctx.record_info(
+                metric="onnx.embedding.batch.tokens",
+                value=tokens,
+                kind="histogram",
             )
-
-        else:
-            return (
-                min(tokenizer_config["model_max_length"], tokenizer_config["max_length"]),
-                tokenizer_config["pad_token"],
+            ctx.record_info(
+                metric="onnx.embedding.batch.padding_ratio",
+                value=1 - tokens / padded_tokens if padded_tokens else 0.0,
+                kind="histogram",
             )
 
+        return await self._run_batches(
+            lengths,
+            prepare_inputs=prepare_inputs,
+            processing=lambda input_ids, attention_mask: self._embed_inputs(
+                input_ids,
+                attention_mask,
+                config=config,
+            ),
+            batch_size=config.batch_size,
+            max_batch_tokens=config.max_batch_tokens,
+            length_bucketing=config.length_bucketing,
+            batch_metrics=record_batch,
+        )
 
-def _load_tokenizer(model_dir: Path) -> Tokenizer:
-    tokenizer_path = model_dir / "tokenizer.json"
-    if not tokenizer_path.exists():
-        raise ValueError(f"Missing tokenizer.json at {model_dir}")
+    def _embed_inputs(
+        self,
+        input_ids: NumpyArray,
+        attention_mask: NumpyArray,
+        /,
+        *,
+        config: ONNXEmbeddingConfig,
+    ) -> NumpyArray:
+        def pool_outputs(model_output: Sequence[Any]) -> NumpyArray:
+            # Pool token embeddings using the attention mask
+            embeddings: NumpyArray = pool_embeddings(
+                model_output[0],
+                attention_mask=attention_mask,
+                pooling=config.pooling,
+            ).astype(np.float32, copy=False)
+            truncated: bool = False
+            if config.dimensions is not None:
+                if not 0 < config.dimensions <= embeddings.shape[1]:
+                    raise ValueError(
+                        f"Requested {config.dimensions} dimensions is out of"
+                        f" model embedding size {embeddings.shape[1]}"
+                    )
+
+                # matryoshka models keep most information in leading dimensions
+                truncated = config.dimensions < embeddings.shape[1]
+                embeddings = embeddings[:, : config.dimensions]
+
+            if self._buffers is not None and np.may_share_memory(embeddings, model_output[0]):
+                embeddings = embeddings.copy()  # bound output buffers are reused
+
+            # truncated vectors lose their norm, they are always normalized again
+            if config.normalize or truncated:
+                normalize_embeddings(embeddings)
+
+            return embeddings
+
+        token_type_ids: NumpyArray | None = None
+        try:
+            onnx_input: dict[str, np.ndarray] = {
+                "input_ids": input_ids,
+            }
+            # Add attention mask if needed
+            if "attention_mask" in self.input_names:
+                onnx_input["attention_mask"] = attention_mask
+            # Add token type ids if needed
+            if "token_type_ids" in self.input_names:
+                if self._buffers is not None:
+                    token_type_ids = self._buffers.acquire(input_ids.shape, dtype=np.int64)
+                    token_type_ids.fill(0)
 
-    tokenizer = Tokenizer.from_file(str(tokenizer_path))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+                else:
+                    token_type_ids = np.zeros_like(input_ids, dtype=np.int64)
 
-    max_length, pad_token = _load_tokenizer_config(model_dir)
-    tokenizer.enable_truncation(max_length=max_length)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
-    pad_token_id = _load_pad_token_id(model_dir)
-    tokenizer.enable_padding(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
-        pad_id=pad_token_id,
-        pad_token=pad_token,
-    )
+                onnx_input["token_type_ids"] = token_type_ids
+            # Run the model
+            if self._buffers is not None:
+                return self._run_bound(
+                    onnx_input,
+                    processing=pool_outputs,
+                )
 
-    if tokens_map := _load_tokenizer_special_tokens(model_dir):
-        for token in tokens_map.values():
-            if isinstance(token, str):
-                tokenizer.add_special_tokens([token])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+            return pool_outputs(self._run(input_feed=onnx_input))  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
 
-            elif isinstance(token, dict):
-                tokenizer.add_special_tokens([AddedToken(**token)])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+        except Exception as e:
+            raise RuntimeError(f"Text embedding failed: {e}") from e
 
-    return tokenizer  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+        finally:
+            if self._buffers is not None and token_type_ids is not None:
+                self._buffers.release(token_type_ids)
+
+
+def _encoding_windows(
+    encodings: Sequence[Encoding],
+    /,
+) -> tuple[Sequence[Encoding], Sequence[int]]:
+    # texts exceeding max length are split by the tokenizer into overflowing windows
+    windows: list[Encoding] = []
+    starts: list[int] = []
+    for encoding in encodings:
+        starts.append(len(windows))
+        windows.append(encoding)
+        windows.extend(encoding.overflowing)  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+    return (windows, starts)
+
+
+def _window_offsets(
+    window: Encoding,
+    /,
+) -> tuple[int, int]:
+    offsets: list[tuple[int, int]] = [
+        offset
+        for offset, special in zip(window.offsets, window.special_tokens_mask, strict=True)  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType, reportUnknownVariableType]
+        if not special
+    ]
+    if not offsets:
+        return (0, 0)
+
+    return (offsets[0][0], offsets[-1][1])
@@ -0,0 +1,339 @@
+import json
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from types import TracebackType
+from typing import Any, cast, override
+
+import numpy as np
+from draive import DataModel, Embedded, ImageEmbedding, State, as_list
+from haiway import ctx
+
+from integrations.onnx.buffers import ONNXBufferPool
+from integrations.onnx.model import ONNXModel
+from integrations.onnx.pooling import normalize_embeddings
+from integrations.onnx.registry import ONNXSessionRegistry
+from integrations.onnx.types import (
+    ONNXExecutionProvider,
+    ONNXSessionOptions,  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+)
+
+__all__ = (
+    "ONNXImageEmbeddingConfig",
+    "ONNXImageEmbeddingModel",
+)
+
+
+type NumpyArray = np.ndarray
+
+# CLIP preprocessing used when the model does not provide preprocessor_config.json
+_DEFAULT_IMAGE_SIZE: int = 224
+_DEFAULT_IMAGE_MEAN: tuple[float, float, float] = (0.48145466, 0.4578275, 0.40821073)
+_DEFAULT_IMAGE_STD: tuple[float, float, float] = (0.26862954, 0.26130258, 0.27577711)
+
+
+class ONNXImageEmbeddingConfig(State):
+    batch_size: int = 16
+    normalize: bool = False
+
+
+class ONNXImageEmbeddingModel(ONNXModel):
+    __slots__ = (
+        "_decoding_executor",
+        "_decoding_workers",
+        "_image_size",
+        "_pixel_offset",
+        "_pixel_scale",
+        "_preprocessor_path",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        model_path: Path | str,
+        /,
+        *,
+        preprocessor_path: Path | str | None = None,
+        execution_provider: ONNXExecutionProvider,
+        session_options: ONNXSessionOptions | None = None,  # pyright: ignore[reportUnknownParameterType]
+        optimized: bool = False,
+        concurrent_runs: int | None = None,
+        max_pending_runs: int | None = None,
+        lazy: bool = False,
+        idle_ttl: float | None = None,
+        sessions: ONNXSessionRegistry | None = None,
+        io_binding: bool = False,
+        decoding_workers: int | None = None,
+    ) -> None:
+        assert decoding_workers is None or decoding_workers > 0  # nosec: B101
+        super().__init__(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+            model_path,
+            execution_provider=execution_provider,
+            session_options=session_options,
+            optimized=optimized,
+            concurrent_runs=concurrent_runs,
+            max_pending_runs=max_pending_runs,
+            lazy=lazy,
+            idle_ttl=idle_ttl,
+            sessions=sessions,
+            io_binding=io_binding,
+        )
+
+        self._preprocessor_path: Path
+        match preprocessor_path:
+            case None:
+                self._preprocessor_path = Path(model_path).parent
+
+            case path:
+                self._preprocessor_path = Path(path)
+
+        self._decoding_workers: int | None = decoding_workers
+        # Pillow releases the GIL while decoding and resizing, decode images in parallel
+        self._decoding_executor: ThreadPoolExecutor
+        self._image_size: int
+        # normalization is applied as a single multiply and subtract per channel
+        self._pixel_scale: NumpyArray
+        self._pixel_offset: NumpyArray
+
+    @override
+    def _initialize_session(self) -> None:
+        super()._initialize_session()
+        image_size, image_mean, image_std = _load_preprocessing(self._preprocessor_path)
+        self._image_size = image_size
+        mean: NumpyArray = np.array(image_mean, dtype=np.float32).reshape(3, 1, 1)
+        std: NumpyArray = np.array(image_std, dtype=np.float32).reshape(3, 1, 1)
+        self._pixel_scale = 1.0 / (255.0 * std)
+        self._pixel_offset = mean / std
+        self._decoding_executor = ThreadPoolExecutor(
+            max_workers=self._decoding_workers,
+            thread_name_prefix="onnx_image_decoding",
+        )
+
+    @override
+    def _deinitialize_session(self) -> None:
+        if hasattr(self, "_decoding_executor"):
+            self._decoding_executor.shutdown(wait=False)
+            del self._decoding_executor
+
+        super()._deinitialize_session()
+
+    async def __aenter__(self) -> ImageEmbedding:
+        await self._enter_scope()
+
+        async def create_images_embedding[Value: DataModel | State](
+            values: Sequence[Value] | Sequence[bytes],
+            /,
+            attribute: Callable[[Value], bytes] | None = None,
+            *,
+            config: ONNXImageEmbeddingConfig | None = None,
+            **extra: Any,
+        ) -> Sequence[Embedded[Value]] | Sequence[Embedded[bytes]]:
+            attributes: list[bytes]
+            if attribute is None:
+                attributes = cast(list[bytes], as_list(values))
+
+            else:
+                attributes = [attribute(cast(Value, value)) for value in values]
+
+            assert all(isinstance(element, bytes) for element in attributes)  # nosec: B101
+
+            embeddings: NumpyArray = await self.embed_images(
+                attributes,
+                config=config,
+            )
+            # Embedded requires sequences of floats, convert all vectors at once
+            return cast(
+                Sequence[Embedded[Value]] | Sequence[Embedded[bytes]],
+                [
+                    Embedded(
+                        value=value,
+                        vector=embedding,
+                    )
+                    for value, embedding in zip(
+                        values,
+                        embeddings.tolist(),
+                        strict=True,
+                    )
+                ],
+            )
+
+        return ImageEmbedding(embedding=create_images_embedding)
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if self._exit_scope():
+            self._deinitialize_session()
+
+    async def embed_images(
+        self,
+        images: Sequence[bytes],
+        /,
+        *,
+        config: ONNXImageEmbeddingConfig | None = None,
+    ) -> NumpyArray:
+        await self._load_session()
+        embedding_config: ONNXImageEmbeddingConfig = config or ctx.state(
+            ONNXImageEmbeddingConfig
+        )
+        if not images:
+            return np.empty((0, 0), dtype=np.float32)
+
+        async with ctx.scope("image_embedding"):
+            embeddings: NumpyArray = await self._run_batches(
+                [1] * len(images),
+                prepare_inputs=lambda batch: (
+                    self._prepare_pixel_values([images[index] for index in batch]),
+                ),
+                processing=self._embed_pixel_values,
+                batch_size=embedding_config.batch_size,
+                max_batch_tokens=None,
+                length_bucketing=False,
+            )
+            if embedding_config.normalize:
+                normalize_embeddings(embeddings)
+
+            return embeddings
+
+    def _prepare_pixel_values(
+        self,
+        images: Sequence[bytes],
+        /,
+    ) -> NumpyArray:
+        decoded: list[NumpyArray] = list(
+            self._decoding_executor.map(
+                lambda data: _decode_image(data, size=self._image_size),
+                images,
+            )
+        )
+        return _pixel_values(
+            decoded,
+            scale=self._pixel_scale,
+            offset=self._pixel_offset,
+            buffers=self._buffers,
+        )
+
+    def _embed_pixel_values(
+        self,
+        pixel_values: NumpyArray,
+        /,
+    ) -> NumpyArray:
+        def select_outputs(model_output: Sequence[Any]) -> NumpyArray:
+            embeddings: NumpyArray = model_output[self._embeddings_output]
+            if embeddings.ndim == 3:  # noqa: PLR2004
+                embeddings = embeddings[:, 0]  # use class token of vision transformers
+
+            # always copy as bound output buffers are reused
+            return np.array(embeddings, dtype=np.float32)
+
+        try:
+            onnx_input: dict[str, np.ndarray] = {
+                self.input_names[0]: pixel_values,
+            }
+            if self._buffers is not None:
+                return self._run_bound(
+                    onnx_input,
+                    processing=select_outputs,
+                )
+
+            return select_outputs(self._run(input_feed=onnx_input))  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+        except Exception as e:
+            raise RuntimeError(f"Image embedding failed: {e}") from e
+
+    @property
+    def _embeddings_output(self) -> int:
+        # CLIP vision exports provide projected embeddings next to hidden states
+        output_names: Sequence[str] = self.output_names
+        if "image_embeds" in output_names:
+            return output_names.index("image_embeds")
+
+        return 0
+
+
+def _decode_image(
+    data: bytes,
+    /,
+    *,
+    size: int,
+) -> NumpyArray:
+    # image decoding requires pillow package, see the images extra
+    from PIL import Image  # noqa: PLC0415
+
+    with Image.open(BytesIO(data)) as image:
+        # let the decoder downscale large jpeg images while decoding
+        image.draft("RGB", (size, size))
+        rgb_image: Image.Image = image.convert("RGB")
+
+    # resize the shortest edge to size and crop the center square
+    scale: float = size / min(rgb_image.size)
+    resized: Image.Image = rgb_image.resize(
+        (
+            max(size, round(rgb_image.width * scale)),
+            max(size, round(rgb_image.height * scale)),
+        ),
+        Image.Resampling.BICUBIC,
+    )
+    left: int = (resized.width - size) // 2
+    top: int = (resized.height - size) // 2
+    return np.asarray(resized.crop((left, top, left + size, top + size)))
+
+
+def _pixel_values(
+    images: Sequence[NumpyArray],
+    /,
+    *,
+    scale: NumpyArray,
+    offset: NumpyArray,
+    buffers: ONNXBufferPool | None,
+) -> NumpyArray:
+    height, width, channels = images[0].shape
+    shape: tuple[int, int, int, int] = (len(images), channels, height, width)
+    pixel_values: NumpyArray
+    if buffers is not None:
+        pixel_values = buffers.acquire(shape, dtype=np.float32)
+
+    else:
+        pixel_values = np.empty(shape, dtype=np.float32)
+
+    # copy HWC uint8 images into the NCHW float batch, normalizing all at once
+    for index, image in enumerate(images):
+        np.copyto(pixel_values[index], image.transpose(2, 0, 1))
+
+    pixel_values *= scale
+    pixel_values -= offset
+    return pixel_values
+
+
+def _load_preprocessing(
+    model_dir: Path,
+) -> tuple[int, Sequence[float], Sequence[float]]:
+    config_path = model_dir / "preprocessor_config.json"
+    if not config_path.exists():
+        return (_DEFAULT_IMAGE_SIZE, _DEFAULT_IMAGE_MEAN, _DEFAULT_IMAGE_STD)
+
+    with open(str(config_path)) as file:
+        config: dict[str, Any] = json.load(file)
+
+    image_size: int
+    match config.get("crop_size", config.get("size", _DEFAULT_IMAGE_SIZE)):
+        case int() as size:
+            image_size = size
+
+        case {"height": int() as size}:
+            image_size = size
+
+        case {"shortest_edge": int() as size}:
+            image_size = size
+
+        case _:
+            image_size = _DEFAULT_IMAGE_SIZE
+
+    return (
+        image_size,
+        config.get("image_mean", _DEFAULT_IMAGE_MEAN),
+        config.get("image_std", _DEFAULT_IMAGE_STD),
+    )
@@ -0,0 +1,165 @@
+from asyncio import (
+    AbstractEventLoop,
+    CancelledError,
+    Future,
+    Task,
+    TimerHandle,
+    gather,
+    get_running_loop,
+)
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Protocol, Self
+
+__all__ = ("MicroBatcher",)
+
+
+class _Slicing(Protocol):
+    def __getitem__(self, key: slice, /) -> Self: ...
+
+
+class _PendingRequest[Value, Config, Result: _Slicing]:
+    __slots__ = (
+        "config",
+        "future",
+        "values",
+    )
+
+    def __init__(
+        self,
+        values: Sequence[Value],
+        config: Config,
+        future: Future[Result],
+    ) -> None:
+        self.values: Sequence[Value] = values
+        self.config: Config = config
+        self.future: Future[Result] = future
+
+
+class MicroBatcher[Value, Config, Result: _Slicing]:
+    __slots__ = (
+        "_flush_handle",
+        "_max_batch_size",
+        "_max_wait",
+        "_pending",
+        "_pending_size",
+        "_processing",
+        "_running",
+    )
+
+    def __init__(
+        self,
+        processing: Callable[[Sequence[Value], Config], Awaitable[Result]],
+        /,
+        *,
+        max_wait_ms: float,
+        max_batch_size: int,
+    ) -> None:
+        assert max_wait_ms >= 0  # nosec: B101
+        assert max_batch_size > 0  # nosec: B101
+        self._processing: Callable[[Sequence[Value], Config], Awaitable[Result]] = (
+            processing
+        )
+        self._max_wait: float = max_wait_ms / 1000
+        self._max_batch_size: int = max_batch_size
+        self._pending: list[_PendingRequest[Value, Config, Result]] = []
+        self._pending_size: int = 0
+        self._flush_handle: TimerHandle | None = None
+        self._running: set[Task[None]] = set()
+
+    async def process(
+        self,
+        values: Sequence[Value],
+        /,
+        *,
+        config: Config,
+    ) -> Result:
+        loop: AbstractEventLoop = get_running_loop()
+        future: Future[Result] = loop.create_future()
+        self._pending.append(
+            _PendingRequest(
+                values,
+                config,
+                future,
+            )
+        )
+        self._pending_size += len(values)
+
+        if self._pending_size >= self._max_batch_size:
+            self._flush()
+
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._max_wait, self._flush)
+
+        return await future
+
+    async def close(self) -> None:
+        # process requests which are still waiting and wait for all running batches
+        self._flush()
+        await gather(*self._running, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending: list[_PendingRequest[Value, Config, Result]] = self._pending
+        self._pending = []
+        self._pending_size = 0
+
+        # only requests using the same config can share a batch
+        groups: list[tuple[Config, list[_PendingRequest[Value, Config, Result]]]] = []
+        for request in pending:
+            if request.future.done():
+                continue  # caller is no longer waiting
+
+            for config, requests in groups:
+                if config == request.config:
+                    requests.append(request)
+                    break
+
+            else:
+                groups.append((request.config, [request]))
+
+        for config, requests in groups:
+            task: Task[None] = get_running_loop().create_task(
+                self._process(
+                    requests,
+                    config=config,
+                )
+            )
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _process(
+        self,
+        requests: Sequence[_PendingRequest[Value, Config, Result]],
+        /,
+        *,
+        config: Config,
+    ) -> None:
+        try:
+            results: Result = await self._processing(
+                [value for request in requests for value in request.values],
+                config,
+            )
+
+        except CancelledError:
+            for request in requests:
+                request.future.cancel()
+
+            raise
+
+        except Exception as exc:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(exc)
+
+            return
+
+        offset: int = 0
+        for request in requests:
+            count: int = len(request.values)
+            if not request.future.done():
+                request.future.set_result(results[offset : offset + count])
+
+            offset += count
@@ -1,16 +1,21 @@
-import gc
-from asyncio import to_thread
-from collections.abc import Mapping, Sequence
+import os
+from asyncio import Lock, Semaphore, Task, create_task, to_thread
+from collections.abc import Callable, Hashable, Mapping, Sequence
 from pathlib import Path
+from time import perf_counter
 from typing import Any
 
 import numpy as np
 import onnxruntime as onnx
 from draive import as_dict, as_list, ctx
 
+from integrations.onnx.batching import prepare_batches
+from integrations.onnx.buffers import ONNXBufferPool
+from integrations.onnx.registry import ONNXSessionRegistry, shared_sessions
 from integrations.onnx.types import (
     ONNXExcetion,
     ONNXExecutionProvider,
+    ONNXOverloaded,
     ONNXSessionOptions,  # pyright: ignore[reportUnknownVariableType]
 )
 
@@ -19,20 +24,41 @@ __all__ = ("ONNXModel",)
 
 class ONNXModel:
     __slots__ = (
+        "_buffers",
         "_execution_provider",
+        "_idle_ttl",
+        "_lazy",
+        "_max_pending_runs",
         "_model_path",
+        "_pending_runs",
+        "_runs_limit",
+        "_scopes",
         "_session",
+        "_session_key",
+        "_session_lock",
         "_session_options",
+        "_session_ready",
+        "_sessions",
     )
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         model_path: Path | str,
         /,
         *,
         execution_provider: ONNXExecutionProvider,
         session_options: ONNXSessionOptions | None = None,  # pyright: ignore[reportUnknownParameterType]
+        optimized: bool = False,
+        concurrent_runs: int | None = None,
+        max_pending_runs: int | None = None,
+        lazy: bool = False,
+        idle_ttl: float | None = None,
+        sessions: ONNXSessionRegistry | None = None,
+        io_binding: bool = False,
     ) -> None:
+        assert concurrent_runs is None or concurrent_runs > 0  # nosec: B101
+        assert max_pending_runs is None or max_pending_runs > 0  # nosec: B101
+        assert idle_ttl is None or idle_ttl >= 0  # nosec: B101
         self._model_path: Path | str = model_path
         self._execution_provider: ONNXExecutionProvider = execution_provider
         self._session_options: ONNXSessionOptions
@@ -41,12 +67,40 @@ class ONNXModel:
 
         else:
             default_options = onnx.SessionOptions()  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
-            default_options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_ENABLE_ALL  # pyright: ignore
+            # model optimized offline does not have to be optimized again on each load
+            default_options.graph_optimization_level = (  # pyright: ignore
+                onnx.GraphOptimizationLevel.ORT_DISABLE_ALL  # pyright: ignore
+                if optimized
+                else onnx.GraphOptimizationLevel.ORT_ENABLE_ALL  # pyright: ignore
+            )
             default_options.execution_mode = onnx.ExecutionMode.ORT_SEQUENTIAL  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
             default_options.log_severity_level = 1 if __debug__ else 3
             self._session_options = default_options
 
+        # InferenceSession.run is thread safe, allow multiple runs in flight
+        self._runs_limit: Semaphore = Semaphore(
+            concurrent_runs or _default_concurrent_runs(self._session_options)  # pyright: ignore[reportUnknownArgumentType]
+        )
+        self._pending_runs: int = 0
+        self._max_pending_runs: int | None = max_pending_runs
+        # sessions are shared by all models using the same file and options within the process
+        self._sessions: ONNXSessionRegistry = sessions or shared_sessions
+        self._session_key: Hashable = (
+            str(Path(model_path).resolve()),
+            repr(execution_provider),
+            _session_options_key(self._session_options),  # pyright: ignore[reportUnknownArgumentType]
+        )
+        # lazy models load the session on first use instead of entering the context
+        self._lazy: bool = lazy
+        # keep the session loaded for idle_ttl seconds after the last model releases it
+        self._idle_ttl: float | None = idle_ttl
+        self._session_lock: Lock = Lock()
+        self._session_ready: bool = False
+        # a model may be entered by multiple scopes at once, the last one to exit releases it
+        self._scopes: int = 0
         self._session: onnx.InferenceSession
+        # io binding reuses pooled input and output buffers instead of allocating per run
+        self._buffers: ONNXBufferPool | None = ONNXBufferPool() if io_binding else None
 
     @property
     def input_names(self) -> Sequence[str]:
@@ -56,10 +110,50 @@ class ONNXModel:
     def output_names(self) -> Sequence[str]:
         return tuple(element.name for element in self._session.get_outputs())  # pyright: ignore[reportUnknownVariableType, reportUnknownArgumentType, reportUnknownMemberType]
 
+    async def _enter_scope(self) -> None:
+        self._scopes += 1
+        if not self._lazy:
+            await self._load_session()
+
+    def _exit_scope(self) -> bool:
+        assert self._scopes > 0  # nosec: B101
+        self._scopes -= 1
+        # session is released only when no other scope uses the model
+        return self._scopes == 0
+
+    async def _load_session(self) -> None:
+        if self._session_ready:
+            return  # already loaded
+
+        async with self._session_lock:
+            if self._session_ready:
+                return  # loaded while waiting for the lock
+
+            loading_start: float = perf_counter()
+            await to_thread(self._initialize_session)
+            await self._warm_up()
+            self._session_ready = True
+            ctx.record_info(
+                metric="onnx.session.loading",
+                value=perf_counter() - loading_start,
+                unit="s",
+                kind="histogram",
+                attributes={"model": str(self._model_path)},
+            )
+
+    async def _warm_up(self) -> None:
+        pass  # nothing to warm up by default
+
     def _initialize_session(self) -> None:
         if hasattr(self, "_session"):
             return  # already initialized
 
+        self._session = self._sessions.acquire(
+            self._session_key,
+            loading=self._create_session,
+        )
+
+    def _create_session(self) -> onnx.InferenceSession:
         ctx.log_info(f"Loading onnx model from {self._model_path}")
 
         path: Path
@@ -74,7 +168,7 @@ class ONNXModel:
             raise FileNotFoundError(f"onnx model not found at {path}")
 
         try:
-            self._session = onnx.InferenceSession(
+            return onnx.InferenceSession(
                 str(path),
                 sess_options=self._session_options,  # pyright: ignore[reportUnknownArgumentType, reportUnknownMemberType]
                 providers=[self._execution_provider],
@@ -87,8 +181,110 @@ class ONNXModel:
         if not hasattr(self, "_session"):
             return  # already deinitialized
 
+        self._session_ready = False
         del self._session
-        gc.collect()
+        if self._buffers is not None:
+            self._buffers.clear()
+
+        self._sessions.release(
+            self._session_key,
+            idle_ttl=self._idle_ttl,
+        )
+
+    async def _execute[**Args, Result](
+        self,
+        function: Callable[Args, Result],
+        /,
+        *args: Args.args,
+        **kwargs: Args.kwargs,
+    ) -> Result:
+        # reject new work early instead of growing the queue without bounds
+        if self._max_pending_runs is not None and self._pending_runs >= self._max_pending_runs:
+            raise ONNXOverloaded(f"onnx model {self._model_path} has too many pending runs")
+
+        queued_at: float = perf_counter()
+        self._pending_runs += 1
+        try:
+            async with self._runs_limit:
+                run_start: float = perf_counter()
+                ctx.record_info(
+                    metric="onnx.run.queue_wait",
+                    value=run_start - queued_at,
+                    unit="s",
+                    kind="histogram",
+                    attributes={"model": str(self._model_path)},
+                )
+                try:
+                    return await to_thread(function, *args, **kwargs)
+
+                finally:
+                    ctx.record_info(
+                        metric="onnx.run.duration",
+                        value=perf_counter() - run_start,
+                        unit="s",
+                        kind="histogram",
+                        attributes={"model": str(self._model_path)},
+                    )
+
+        finally:
+            self._pending_runs -= 1
+
+    async def _run_batches(  # noqa: PLR0913
+        self,
+        lengths: Sequence[int],
+        /,
+        *,
+        prepare_inputs: Callable[[Sequence[int]], tuple[np.ndarray, ...]],
+        processing: Callable[..., np.ndarray],
+        batch_size: int,
+        max_batch_tokens: int | None,
+        length_bucketing: bool,
+        batch_metrics: Callable[[Sequence[int], tuple[np.ndarray, ...]], None] | None = None,
+    ) -> np.ndarray:
+        batches: Sequence[Sequence[int]] = prepare_batches(
+            lengths,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            length_bucketing=length_bucketing,
+        )
+        if not batches:
+            return np.empty((0,), dtype=np.float32)
+
+        # Results of all batches are written into a single contiguous float32 array
+        results: np.ndarray | None = None
+        # Inputs of the next batch are prepared while the current batch runs (double buffering)
+        next_inputs: Task[tuple[np.ndarray, ...]] = create_task(
+            to_thread(prepare_inputs, batches[0])
+        )
+        try:
+            for index, batch in enumerate(batches):
+                inputs: tuple[np.ndarray, ...] = await next_inputs
+                if index + 1 < len(batches):
+                    next_inputs = create_task(to_thread(prepare_inputs, batches[index + 1]))
+
+                if batch_metrics is not None:
+                    batch_metrics(batch, inputs)
+
+                batch_results: np.ndarray = await self._execute(
+                    processing,
+                    *inputs,
+                )
+                if results is None:
+                    results = np.empty(
+                        (len(lengths), *batch_results.shape[1:]),
+                        dtype=np.float32,
+                    )
+
+                # Restore the original order of elements
+                results[batch] = batch_results
+                if self._buffers is not None:
+                    self._buffers.release(*inputs)
+
+        finally:
+            next_inputs.cancel()
+
+        assert results is not None  # nosec: B101
+        return results
 
     async def run(
         self,
@@ -98,7 +294,8 @@ class ONNXModel:
         run_options: onnx.RunOptions | None = None,  # pyright: ignore[reportUnknownParameterType, reportUnknownMemberType]
     ) -> Sequence[np.ndarray | Any]:
         ctx.log_debug(f"Running onnx model {self._model_path}")
-        return await to_thread(
+        await self._load_session()
+        return await self._execute(
             self._run,  # pyright: ignore
             output_names=output_names,
             input_feed=input_feed,
@@ -121,3 +318,147 @@ class ONNXModel:
 
         except Exception as exc:
             raise ONNXExcetion(f"onnx model run failed: {exc}") from exc
+
+    def _run_bound[Result](
+        self,
+        input_feed: Mapping[str, np.ndarray],
+        /,
+        *,
+        processing: Callable[[Sequence[np.ndarray]], Result],
+    ) -> Result:
+        # outputs are valid only within processing, buffers are reused by following runs
+        assert self._buffers is not None  # nosec: B101
+        try:
+            binding = self._session.io_binding()  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+            for name, value in input_feed.items():
+                binding.bind_cpu_input(name, value)  # pyright: ignore[reportUnknownMemberType]
+
+            outputs: list[np.ndarray] | None = self._bind_outputs(
+                binding,  # pyright: ignore[reportUnknownArgumentType]
+                input_feed=input_feed,
+            )
+            self._session.run_with_iobinding(binding)  # pyright: ignore[reportUnknownMemberType]
+
+        except Exception as exc:
+            raise ONNXExcetion(f"onnx model run failed: {exc}") from exc
+
+        if outputs is None:  # output shapes are unknown, onnxruntime allocated outputs
+            return processing(binding.copy_outputs_to_cpu())  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+        try:
+            return processing(outputs)
+
+        finally:
+            self._buffers.release(*outputs)
+
+    def _bind_outputs(
+        self,
+        binding: Any,
+        /,
+        *,
+        input_feed: Mapping[str, np.ndarray],
+    ) -> list[np.ndarray] | None:
+        assert self._buffers is not None  # nosec: B101
+        dimensions: Mapping[str, int] = _symbolic_dimensions(
+            self._session.get_inputs(),  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+            input_feed=input_feed,
+        )
+        shapes: list[tuple[int, ...]] = []
+        for output in self._session.get_outputs():  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+            shape: tuple[int, ...] | None = _output_shape(
+                output.shape,  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+                dimensions=dimensions,
+            )
+            if shape is None or output.type != "tensor(float)":  # pyright: ignore[reportUnknownMemberType]
+                for element in self._session.get_outputs():  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+                    binding.bind_output(element.name)  # pyright: ignore[reportUnknownMemberType]
+
+                return None
+
+            shapes.append(shape)
+
+        outputs: list[np.ndarray] = [
+            self._buffers.acquire(shape, dtype=np.float32) for shape in shapes
+        ]
+        for output, buffer in zip(self._session.get_outputs(), outputs, strict=True):  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+            binding.bind_output(  # pyright: ignore[reportUnknownMemberType]
+                output.name,  # pyright: ignore[reportUnknownMemberType]
+                device_type="cpu",
+                device_id=0,
+                element_type=np.float32,
+                shape=buffer.shape,
+                buffer_ptr=buffer.ctypes.data,
+            )
+
+        return outputs
+
+
+def _symbolic_dimensions(
+    inputs: Sequence[Any],
+    /,
+    *,
+    input_feed: Mapping[str, np.ndarray],
+) -> Mapping[str, int]:
+    # sizes of named symbolic input dimensions (i.e. batch_size, sequence_length) in this run
+    dimensions: dict[str, int] = {}
+    conflicting: set[str] = set()
+    for element in inputs:
+        array: np.ndarray | None = input_feed.get(element.name)
+        if array is None or len(element.shape) != array.ndim:
+            continue
+
+        for dimension, size in zip(element.shape, array.shape, strict=True):
+            if not isinstance(dimension, str):
+                continue
+
+            if dimensions.setdefault(dimension, size) != size:
+                conflicting.add(dimension)
+
+    for dimension in conflicting:
+        del dimensions[dimension]
+
+    return dimensions
+
+
+def _output_shape(
+    shape: Sequence[int | str | None],
+    /,
+    *,
+    dimensions: Mapping[str, int],
+) -> tuple[int, ...] | None:
+    # outputs are preallocated only when each symbolic dimension is shared with inputs by name,
+    # anything else (computed or unnamed dimensions) is left for onnxruntime to allocate
+    resolved: list[int] = []
+    for dimension in shape:
+        if isinstance(dimension, int):
+            resolved.append(dimension)
+
+        elif dimension is not None and dimension in dimensions:
+            resolved.append(dimensions[dimension])
+
+        else:
+            return None
+
+    return tuple(resolved)
+
+
+def _default_concurrent_runs(
+    session_options: ONNXSessionOptions,  # pyright: ignore[reportUnknownParameterType]
+) -> int:
+    intra_op_threads: int = session_options.intra_op_num_threads  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+    if intra_op_threads <= 0:  # onnxruntime uses all physical cores for a single run by default
+        return 1
+
+    return max(1, (os.cpu_count() or 1) // intra_op_threads)
+
+
+def _session_options_key(
+    session_options: ONNXSessionOptions,  # pyright: ignore[reportUnknownParameterType]
+) -> Hashable:
+    return (
+        int(session_options.graph_optimization_level),  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+        int(session_options.execution_mode),  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+        session_options.intra_op_num_threads,  # pyright: ignore[reportUnknownMemberType]
+        session_options.inter_op_num_threads,  # pyright: ignore[reportUnknownMemberType]
+        session_options.optimized_model_filepath,  # pyright: ignore[reportUnknownMemberType]
+    )
@@ -0,0 +1,82 @@
+from collections.abc import Sequence
+from typing import Literal
+
+import numpy as np
+
+from integrations.onnx.types import ONNXEmbeddingPooling
+
+__all__ = (
+    "combine_windows",
+    "normalize_embeddings",
+    "pool_embeddings",
+)
+
+
+type NumpyArray = np.ndarray
+
+
+def pool_embeddings(
+    embeddings: NumpyArray,
+    /,
+    *,
+    attention_mask: NumpyArray,
+    pooling: ONNXEmbeddingPooling,
+) -> NumpyArray:
+    match embeddings.ndim:
+        case 2:  # (batch_size, embedding_dim) - model output is already pooled
+            return embeddings
+
+        case 3:  # (batch_size, seq_len, embedding_dim)
+            pass
+
+        case _:
+            raise ValueError(f"Unsupported embedding shape: {embeddings.shape}")
+
+    match pooling:
+        case "cls":
+            return embeddings[:, 0]  # Take the [CLS] token embedding
+
+        case "mean":
+            # sum only tokens covered by the attention mask without materializing masked copy
+            summed: NumpyArray = np.einsum(
+                "bsd,bs->bd",
+                embeddings,
+                attention_mask.astype(embeddings.dtype, copy=False),
+            )
+            counts: NumpyArray = np.maximum(attention_mask.sum(axis=1, keepdims=True), 1)
+            summed /= counts
+            return summed
+
+        case "max":
+            # model output is not reused, mask padding tokens in place
+            embeddings[attention_mask == 0] = -np.inf
+            return embeddings.max(axis=1)
+
+
+def normalize_embeddings(
+    embeddings: NumpyArray,
+    /,
+) -> NumpyArray:
+    norms: NumpyArray = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.maximum(norms, np.finfo(embeddings.dtype).tiny, out=norms)
+    embeddings /= norms
+    return embeddings
+
+
+def combine_windows(
+    embeddings: NumpyArray,
+    /,
+    *,
+    starts: Sequence[int],
+    strategy: Literal["mean", "max"],
+) -> NumpyArray:
+    # windows of each text are consecutive rows starting at given indices
+    match strategy:
+        case "mean":
+            counts: NumpyArray = np.diff(np.append(starts, len(embeddings)))
+            combined: NumpyArray = np.add.reduceat(embeddings, starts, axis=0)
+            combined /= counts[:, np.newaxis]
+            return combined
+
+        case "max":
+            return np.maximum.reduceat(embeddings, starts, axis=0)
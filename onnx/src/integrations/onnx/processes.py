@@ -0,0 +1,428 @@
+import os
+from asyncio import (
+    AbstractEventLoop,
+    Future,
+    gather,
+    get_running_loop,
+    new_event_loop,
+    to_thread,
+)
+from collections.abc import Callable, Coroutine, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from types import TracebackType
+from typing import Any, cast
+
+import numpy as np
+import onnxruntime as onnx
+from draive import DataModel, Embedded, State, TextEmbedding, as_list
+from haiway import ctx
+
+from integrations.onnx.embedding import ONNXEmbeddingConfig, ONNXEmbeddingModel
+from integrations.onnx.types import ONNXExecutionProvider
+
+__all__ = ("ONNXEmbeddingProcessPool",)
+
+
+type NumpyArray = np.ndarray
+
+
+class ONNXEmbeddingProcessPool:
+    __slots__ = (
+        "_dimension",
+        "_executor",
+        "_model_arguments",
+        "_processes",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        model_path: Path | str,
+        /,
+        *,
+        tokenizer_path: Path | str | None = None,
+        execution_provider: ONNXExecutionProvider,
+        optimized: bool = False,
+        window_overlap: int = 32,
+        processes: int | None = None,
+        intra_op_threads: int | None = None,
+    ) -> None:
+        assert processes is None or processes > 0  # nosec: B101
+        assert intra_op_threads is None or intra_op_threads > 0  # nosec: B101
+        self._processes: int = processes or os.cpu_count() or 1
+        # workers split available cores instead of competing for all of them
+        self._model_arguments: tuple[Any, ...] = (
+            str(model_path),
+            str(tokenizer_path) if tokenizer_path is not None else None,
+            execution_provider,
+            optimized,
+            window_overlap,
+            intra_op_threads or max(1, (os.cpu_count() or 1) // self._processes),
+        )
+        self._executor: ProcessPoolExecutor | None = None
+        self._dimension: int = 0
+
+    async def __aenter__(self) -> TextEmbedding:
+        assert self._executor is None  # nosec: B101
+        ctx.log_info(f"Starting {self._processes} onnx embedding worker processes")
+        # spawned workers do not inherit event loop and onnxruntime threads of this process
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=get_context("spawn"),
+            initializer=_initialize_worker,
+            initargs=self._model_arguments,
+        )
+        self._dimension = await get_running_loop().run_in_executor(
+            self._executor,
+            _worker_dimension,
+        )
+
+        async def create_texts_embedding[Value: DataModel | State](
+            values: Sequence[Value] | Sequence[str],
+            /,
+            attribute: Callable[[Value], str] | None = None,
+            *,
+            config: ONNXEmbeddingConfig | None = None,
+            **extra: Any,
+        ) -> Sequence[Embedded[Value]] | Sequence[Embedded[str]]:
+            attributes: list[str]
+            if attribute is None:
+                attributes = cast(list[str], as_list(values))
+
+            else:
+                attributes = [attribute(cast(Value, value)) for value in values]
+
+            assert all(isinstance(element, str) for element in attributes)  # nosec: B101
+
+            embeddings: NumpyArray = await self.embed_texts(
+                attributes,
+                config=config,
+            )
+            # Embedded requires sequences of floats, convert all vectors at once
+            return cast(
+                Sequence[Embedded[Value]] | Sequence[Embedded[str]],
+                [
+                    Embedded(
+                        value=value,
+                        vector=embedding,
+                    )
+                    for value, embedding in zip(
+                        values,
+                        embeddings.tolist(),
+                        strict=True,
+                    )
+                ],
+            )
+
+        return TextEmbedding(embedding=create_texts_embedding)
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if self._executor is None:
+            return  # not started
+
+        executor: ProcessPoolExecutor = self._executor
+        self._executor = None
+        await to_thread(
+            executor.shutdown,
+            wait=True,
+            cancel_futures=True,
+        )
+
+    async def embed_texts(
+        self,
+        texts: Sequence[str],
+        /,
+        *,
+        config: ONNXEmbeddingConfig | None = None,
+    ) -> NumpyArray:
+        embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # texts are split into contiguous chunks, one per worker, each writing its own rows
+        return await self._embed_chunks(
+            len(texts),
+            batch_size=embedding_config.batch_size,
+            dimension=self._output_dimension(embedding_config),
+            chunk_embedding=lambda start, end, output: (
+                _embed_texts_chunk,
+                (
+                    list(texts[start:end]),
+                    start,
+                    output,
+                    _config_fields(embedding_config),
+                ),
+            ),
+        )
+
+    async def embed_tokens(
+        self,
+        input_ids: NumpyArray,
+        attention_mask: NumpyArray,
+        /,
+        *,
+        config: ONNXEmbeddingConfig | None = None,
+    ) -> NumpyArray:
+        assert input_ids.shape == attention_mask.shape  # nosec: B101
+        embedding_config: ONNXEmbeddingConfig = config or ctx.state(ONNXEmbeddingConfig)
+        if input_ids.shape[0] == 0:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # token inputs are shared with workers through shared memory as well
+        inputs_memory: SharedMemory = SharedMemory(
+            create=True,
+            size=2 * input_ids.size * np.dtype(np.int64).itemsize,
+        )
+        try:
+            inputs: NumpyArray = np.ndarray(
+                (2, *input_ids.shape),
+                dtype=np.int64,
+                buffer=inputs_memory.buf,
+            )
+            inputs[0] = input_ids
+            inputs[1] = attention_mask
+            del inputs  # release the buffer before closing shared memory
+
+            return await self._embed_chunks(
+                len(input_ids),
+                batch_size=embedding_config.batch_size,
+                dimension=self._output_dimension(embedding_config),
+                chunk_embedding=lambda start, end, output: (
+                    _embed_tokens_chunk,
+                    (
+                        (inputs_memory.name, tuple(input_ids.shape)),
+                        start,
+                        end,
+                        output,
+                        _config_fields(embedding_config),
+                    ),
+                ),
+            )
+
+        finally:
+            inputs_memory.close()
+            inputs_memory.unlink()
+
+    def _output_dimension(
+        self,
+        config: ONNXEmbeddingConfig,
+        /,
+    ) -> int:
+        if config.dimensions is None:
+            return self._dimension
+
+        # workers write truncated vectors, shared output has to match their size
+        if not 0 < config.dimensions <= self._dimension:
+            raise ValueError(
+                f"Requested {config.dimensions} dimensions is out of"
+                f" model embedding size {self._dimension}"
+            )
+
+        return config.dimensions
+
+    async def _embed_chunks(
+        self,
+        count: int,
+        /,
+        *,
+        batch_size: int,
+        dimension: int,
+        chunk_embedding: Callable[
+            [int, int, tuple[str, tuple[int, int]]],
+            tuple[Callable[..., None], tuple[Any, ...]],
+        ],
+    ) -> NumpyArray:
+        assert self._executor is not None, "Process pool is not running"  # nosec: B101
+        shape: tuple[int, int] = (count, dimension)
+        output_memory: SharedMemory = SharedMemory(
+            create=True,
+            size=count * dimension * np.dtype(np.float32).itemsize,
+        )
+        try:
+            chunk_size: int = max(batch_size, -(-count // self._processes))
+            loop: AbstractEventLoop = get_running_loop()
+            chunks: list[Future[None]] = []
+            for start in range(0, count, chunk_size):
+                function, arguments = chunk_embedding(
+                    start,
+                    min(start + chunk_size, count),
+                    (output_memory.name, shape),
+                )
+                chunks.append(loop.run_in_executor(self._executor, function, *arguments))
+
+            await gather(*chunks)
+
+            output: NumpyArray = np.ndarray(
+                shape,
+                dtype=np.float32,
+                buffer=output_memory.buf,
+            )
+            # copy out of shared memory which is released right after
+            embeddings: NumpyArray = output.copy()
+            del output
+            return embeddings
+
+        finally:
+            output_memory.close()
+            output_memory.unlink()
+
+
+# worker process state, initialized once per process
+_worker_loop: AbstractEventLoop | None = None
+_worker_model: ONNXEmbeddingModel | None = None
+
+
+def _initialize_worker(  # noqa: PLR0913
+    model_path: str,
+    tokenizer_path: str | None,
+    execution_provider: ONNXExecutionProvider,
+    optimized: bool,
+    window_overlap: int,
+    intra_op_threads: int,
+) -> None:
+    global _worker_loop, _worker_model  # noqa: PLW0603
+    session_options = onnx.SessionOptions()  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
+    session_options.graph_optimization_level = (  # pyright: ignore
+        onnx.GraphOptimizationLevel.ORT_DISABLE_ALL  # pyright: ignore
+        if optimized
+        else onnx.GraphOptimizationLevel.ORT_ENABLE_ALL  # pyright: ignore
+    )
+    session_options.intra_op_num_threads = intra_op_threads  # pyright: ignore[reportUnknownMemberType]
+    session_options.log_severity_level = 1 if __debug__ else 3  # pyright: ignore[reportUnknownMemberType]
+    _worker_loop = new_event_loop()
+    _worker_model = ONNXEmbeddingModel(
+        model_path,
+        tokenizer_path=tokenizer_path,
+        execution_provider=execution_provider,
+        session_options=session_options,  # pyright: ignore[reportUnknownArgumentType]
+        window_overlap=window_overlap,
+    )
+    # entering the model loads its session and tokenizer, kept for the worker lifetime
+    _run_in_worker(_worker_model.__aenter__())
+
+
+def _run_in_worker[Result](
+    coroutine: Coroutine[Any, Any, Result],
+    /,
+) -> Result:
+    assert _worker_loop is not None  # nosec: B101
+
+    async def run() -> Result:
+        async with ctx.scope("onnx_embedding_worker"):
+            return await coroutine
+
+    return _worker_loop.run_until_complete(run())
+
+
+def _worker_dimension() -> int:
+    assert _worker_model is not None  # nosec: B101
+    embeddings: NumpyArray = _run_in_worker(
+        _worker_model.embed_texts(
+            ("dimension",),
+            config=ONNXEmbeddingConfig(),
+        )
+    )
+    return embeddings.shape[1]
+
+
+def _embed_texts_chunk(
+    texts: Sequence[str],
+    start: int,
+    output: tuple[str, tuple[int, int]],
+    config: dict[str, Any],
+) -> None:
+    assert _worker_model is not None  # nosec: B101
+    embeddings: NumpyArray = _run_in_worker(
+        _worker_model.embed_texts(
+            texts,
+            config=ONNXEmbeddingConfig(**config),
+        )
+    )
+    _write_output(
+        embeddings,
+        start=start,
+        output=output,
+    )
+
+
+def _embed_tokens_chunk(
+    inputs: tuple[str, tuple[int, int]],
+    start: int,
+    end: int,
+    output: tuple[str, tuple[int, int]],
+    config: dict[str, Any],
+) -> None:
+    assert _worker_model is not None  # nosec: B101
+    inputs_name, inputs_shape = inputs
+    inputs_memory: SharedMemory = SharedMemory(name=inputs_name, track=False)
+    try:
+        tokens: NumpyArray = np.ndarray(
+            (2, *inputs_shape),
+            dtype=np.int64,
+            buffer=inputs_memory.buf,
+        )
+        # copy rows of this chunk, shared inputs are released by the parent process
+        input_ids: NumpyArray = tokens[0, start:end].copy()
+        attention_mask: NumpyArray = tokens[1, start:end].copy()
+        del tokens
+
+    finally:
+        inputs_memory.close()
+
+    embeddings: NumpyArray = _run_in_worker(
+        _worker_model.embed_tokens(
+            input_ids,
+            attention_mask,
+            config=ONNXEmbeddingConfig(**config),
+        )
+    )
+    _write_output(
+        embeddings,
+        start=start,
+        output=output,
+    )
+
+
+def _write_output(
+    embeddings: NumpyArray,
+    /,
+    *,
+    start: int,
+    output: tuple[str, tuple[int, int]],
+) -> None:
+    output_name, output_shape = output
+    output_memory: SharedMemory = SharedMemory(name=output_name, track=False)
+    try:
+        vectors: NumpyArray = np.ndarray(
+            output_shape,
+            dtype=np.float32,
+            buffer=output_memory.buf,
+        )
+        vectors[start : start + len(embeddings)] = embeddings
+        del vectors
+
+    finally:
+        output_memory.close()
+
+
+def _config_fields(
+    config: ONNXEmbeddingConfig,
+    /,
+) -> dict[str, Any]:
+    # configs are passed to workers as plain values
+    return {
+        "batch_size": config.batch_size,
+        "max_batch_tokens": config.max_batch_tokens,
+        "length_bucketing": config.length_bucketing,
+        "pooling": config.pooling,
+        "normalize": config.normalize,
+        "long_texts": config.long_texts,
+        "dimensions": config.dimensions,
+    }
@@ -0,0 +1,138 @@
+import gc
+from asyncio import get_running_loop
+from collections.abc import Callable, Hashable
+from threading import Lock
+from time import monotonic
+
+import onnxruntime as onnx
+from draive import ctx
+
+__all__ = ("ONNXSessionRegistry",)
+
+
+class _SessionEntry:
+    __slots__ = (
+        "references",
+        "released_at",
+        "session",
+    )
+
+    def __init__(
+        self,
+        session: onnx.InferenceSession,
+    ) -> None:
+        self.session: onnx.InferenceSession = session
+        self.references: int = 0
+        self.released_at: float = 0.0
+
+
+class ONNXSessionRegistry:
+    __slots__ = (
+        "_entries",
+        "_loading_locks",
+        "_lock",
+    )
+
+    def __init__(self) -> None:
+        self._entries: dict[Hashable, _SessionEntry] = {}
+        # sessions are acquired from worker threads, guard entries with a thread lock
+        self._lock: Lock = Lock()
+        # loading a session takes long, only loads of the same session wait for each other
+        self._loading_locks: dict[Hashable, Lock] = {}
+
+    def acquire(
+        self,
+        key: Hashable,
+        /,
+        *,
+        loading: Callable[[], onnx.InferenceSession],
+    ) -> onnx.InferenceSession:
+        with self._lock:
+            if (session := self._reference(key)) is not None:
+                return session
+
+            loading_lock: Lock = self._loading_locks.setdefault(key, Lock())
+
+        with loading_lock:
+            with self._lock:
+                if (session := self._reference(key)) is not None:
+                    return session  # loaded while waiting for the lock
+
+            loaded: onnx.InferenceSession = loading()
+            with self._lock:
+                entry: _SessionEntry = _SessionEntry(loaded)
+                entry.references = 1
+                self._entries[key] = entry
+                return loaded
+
+    def release(
+        self,
+        key: Hashable,
+        /,
+        *,
+        idle_ttl: float | None,
+    ) -> None:
+        with self._lock:
+            entry: _SessionEntry | None = self._entries.get(key)
+            if entry is None:
+                return  # already unloaded
+
+            entry.references -= 1
+            if entry.references > 0:
+                return  # still in use
+
+            entry.released_at = monotonic()
+
+        if idle_ttl is None:
+            self._unload_idle(key, idle_ttl=0)
+            return
+
+        try:
+            get_running_loop().call_later(
+                idle_ttl,
+                self._unload_idle,
+                key,
+                idle_ttl,
+            )
+
+        except RuntimeError:  # no event loop to schedule unloading, unload immediately
+            self._unload_idle(key, idle_ttl=0)
+
+    def unload_idle(self) -> None:
+        for key in tuple(self._entries.keys()):
+            self._unload_idle(key, idle_ttl=0)
+
+    def _reference(
+        self,
+        key: Hashable,
+        /,
+    ) -> onnx.InferenceSession | None:
+        entry: _SessionEntry | None = self._entries.get(key)
+        if entry is None:
+            return None
+
+        entry.references += 1
+        return entry.session
+
+    def _unload_idle(
+        self,
+        key: Hashable,
+        /,
+        idle_ttl: float,
+    ) -> None:
+        with self._lock:
+            entry: _SessionEntry | None = self._entries.get(key)
+            if entry is None or entry.references > 0:
+                return  # already unloaded or acquired again
+
+            if monotonic() - entry.released_at < idle_ttl:
+                return  # released again later, newer unloading is scheduled
+
+            del self._entries[key]
+
+        ctx.log_info(f"Unloading idle onnx model session {key}")
+        del entry
+        gc.collect()
+
+
+shared_sessions: ONNXSessionRegistry = ONNXSessionRegistry()
@@ -0,0 +1,292 @@
+from asyncio import to_thread
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import Any, cast, override
+
+import numpy as np
+from draive import State
+from haiway import ctx
+from tokenizers import Encoding, Tokenizer
+
+from integrations.onnx.buffers import ONNXBufferPool
+from integrations.onnx.model import ONNXModel
+from integrations.onnx.registry import ONNXSessionRegistry
+from integrations.onnx.tokenization import (
+    load_pad_token_id,
+    load_sequence_length,
+    load_tokenizer,
+    prepare_encodings_inputs,
+)
+from integrations.onnx.types import (
+    ONNXExecutionProvider,
+    ONNXPassagesScoring,
+    ONNXSessionOptions,  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+)
+
+__all__ = (
+    "ONNXRerankerConfig",
+    "ONNXRerankerModel",
+    "ONNXReranking",
+)
+
+
+type NumpyArray = np.ndarray
+
+
+class ONNXRerankerConfig(State):
+    batch_size: int = 32
+    max_batch_tokens: int | None = None
+    length_bucketing: bool = False
+    top_k: int | None = None
+    sigmoid: bool = False
+
+
+class ONNXReranking(State):
+    @classmethod
+    async def rerank[Value](
+        cls,
+        query: str,
+        values: Sequence[Value],
+        /,
+        *,
+        attribute: Callable[[Value], str] | None = None,
+        top_k: int | None = None,
+    ) -> Sequence[tuple[Value, float]]:
+        passages: Sequence[str]
+        if attribute is None:
+            passages = cast(Sequence[str], values)
+
+        else:
+            passages = [attribute(value) for value in values]
+
+        scores: Sequence[tuple[int, float]] = await ctx.state(cls).scoring(
+            query,
+            passages,
+            top_k=top_k,
+        )
+        return tuple((values[index], score) for index, score in scores)
+
+    scoring: ONNXPassagesScoring
+
+
+class ONNXRerankerModel(ONNXModel):
+    __slots__ = (
+        "_max_length",
+        "_pad_token_id",
+        "_tokenizer",
+        "_tokenizer_path",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        model_path: Path | str,
+        /,
+        *,
+        tokenizer_path: Path | str | None = None,
+        execution_provider: ONNXExecutionProvider,
+        session_options: ONNXSessionOptions | None = None,  # pyright: ignore[reportUnknownParameterType]
+        optimized: bool = False,
+        concurrent_runs: int | None = None,
+        max_pending_runs: int | None = None,
+        lazy: bool = False,
+        idle_ttl: float | None = None,
+        sessions: ONNXSessionRegistry | None = None,
+        io_binding: bool = False,
+    ) -> None:
+        super().__init__(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+            model_path,
+            execution_provider=execution_provider,
+            session_options=session_options,
+            optimized=optimized,
+            concurrent_runs=concurrent_runs,
+            max_pending_runs=max_pending_runs,
+            lazy=lazy,
+            idle_ttl=idle_ttl,
+            sessions=sessions,
+            io_binding=io_binding,
+        )
+
+        self._tokenizer_path: Path
+        match tokenizer_path:
+            case None:
+                self._tokenizer_path = Path(model_path).parent
+
+            case path:
+                self._tokenizer_path = Path(path)
+
+        self._tokenizer: Tokenizer
+        self._pad_token_id: int
+        self._max_length: int | None
+
+    @override
+    def _initialize_session(self) -> None:
+        super()._initialize_session()
+        # pairs exceeding max length are truncated, overflowing windows are not scored
+        self._tokenizer = load_tokenizer(
+            self._tokenizer_path,
+            window_overlap=0,
+        )
+        self._pad_token_id = load_pad_token_id(self._tokenizer_path)
+        self._max_length = load_sequence_length(self._tokenizer)
+
+    async def __aenter__(self) -> ONNXReranking:
+        await self._enter_scope()
+
+        return ONNXReranking(scoring=self.score_passages)
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if self._exit_scope():
+            self._deinitialize_session()
+
+    async def score_passages(
+        self,
+        query: str,
+        passages: Sequence[str],
+        /,
+        *,
+        top_k: int | None = None,
+        config: ONNXRerankerConfig | None = None,
+    ) -> Sequence[tuple[int, float]]:
+        assert top_k is None or top_k > 0  # nosec: B101
+        await self._load_session()
+        reranker_config: ONNXRerankerConfig = config or ctx.state(ONNXRerankerConfig)
+        if not passages:
+            return ()
+
+        async with ctx.scope("passages_reranking"):
+            # Tokenization does not occupy the inference slot
+            encodings: Sequence[Encoding] = await to_thread(
+                self._tokenize_pairs,
+                query,
+                passages,
+            )
+            scores: NumpyArray = await self._run_batches(
+                [len(encoding.ids) for encoding in encodings],  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+                prepare_inputs=lambda batch: _prepare_pairs_inputs(
+                    [encodings[index] for index in batch],
+                    pad_token_id=self._pad_token_id,
+                    buffers=self._buffers,
+                    max_length=self._max_length,
+                ),
+                processing=self._score_inputs,
+                batch_size=reranker_config.batch_size,
+                max_batch_tokens=reranker_config.max_batch_tokens,
+                length_bucketing=reranker_config.length_bucketing,
+            )
+            if reranker_config.sigmoid:
+                scores = 1.0 / (1.0 + np.exp(-scores))
+
+            return _top_scores(
+                scores,
+                limit=top_k if top_k is not None else reranker_config.top_k,
+            )
+
+    def _tokenize_pairs(
+        self,
+        query: str,
+        passages: Sequence[str],
+        /,
+    ) -> Sequence[Encoding]:
+        return self._tokenizer.encode_batch([(query, passage) for passage in passages])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    def _score_inputs(
+        self,
+        input_ids: NumpyArray,
+        attention_mask: NumpyArray,
+        token_type_ids: NumpyArray,
+        /,
+    ) -> NumpyArray:
+        def score_outputs(model_output: Sequence[Any]) -> NumpyArray:
+            logits: NumpyArray = model_output[0]
+            if logits.ndim == 1:
+                # always copy as bound output buffers are reused
+                return np.array(logits, dtype=np.float32)
+
+            if logits.shape[1] == 1:  # single logit models score relevance directly
+                return np.array(logits[:, 0], dtype=np.float32)
+
+            # otherwise the last class is relevant, score its log odds against other classes
+            # (logits[:, 1] - logits[:, 0] for two classes) so sigmoid gives softmax probability
+            return (
+                logits[:, -1] - np.logaddexp.reduce(logits[:, :-1], axis=1)
+            ).astype(np.float32)
+
+        try:
+            onnx_input: dict[str, np.ndarray] = {
+                "input_ids": input_ids,
+            }
+            if "attention_mask" in self.input_names:
+                onnx_input["attention_mask"] = attention_mask
+
+            if "token_type_ids" in self.input_names:
+                onnx_input["token_type_ids"] = token_type_ids
+
+            if self._buffers is not None:
+                return self._run_bound(
+                    onnx_input,
+                    processing=score_outputs,
+                )
+
+            return score_outputs(self._run(input_feed=onnx_input))  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+        except Exception as e:
+            raise RuntimeError(f"Passages reranking failed: {e}") from e
+
+
+def _prepare_pairs_inputs(
+    encodings: Sequence[Encoding],
+    /,
+    *,
+    pad_token_id: int,
+    buffers: ONNXBufferPool | None,
+    max_length: int | None,
+) -> tuple[NumpyArray, NumpyArray, NumpyArray]:
+    input_ids, attention_mask = prepare_encodings_inputs(
+        encodings,
+        pad_token_id=pad_token_id,
+        buffers=buffers,
+        max_length=max_length,
+    )
+    # cross encoders distinguish query and passage tokens by their type ids
+    token_type_ids: NumpyArray
+    if buffers is not None:
+        token_type_ids = buffers.acquire(input_ids.shape, dtype=np.int64)
+        token_type_ids.fill(0)
+
+    else:
+        token_type_ids = np.zeros_like(input_ids, dtype=np.int64)
+
+    for row, encoding in enumerate(encodings):
+        token_type_ids[row, : len(encoding.type_ids)] = encoding.type_ids  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+    return (input_ids, attention_mask, token_type_ids)
+
+
+def _top_scores(
+    scores: NumpyArray,
+    /,
+    *,
+    limit: int | None,
+) -> Sequence[tuple[int, float]]:
+    indices: NumpyArray
+    if limit is not None and limit < len(scores):
+        # select top elements first, only those have to be sorted
+        indices = np.argpartition(-scores, limit - 1)[:limit]
+        indices = indices[np.argsort(-scores[indices], kind="stable")]
+
+    else:
+        indices = np.argsort(-scores, kind="stable")
+
+    return tuple(
+        zip(
+            indices.tolist(),
+            scores[indices].tolist(),
+            strict=True,
+        )
+    )
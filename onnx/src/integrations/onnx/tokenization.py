@@ -0,0 +1,162 @@
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from tokenizers import AddedToken, Encoding, Tokenizer
+
+from integrations.onnx.buffers import ONNXBufferPool, bucket_size
+
+__all__ = (
+    "acquire_inputs",
+    "load_pad_token_id",
+    "load_sequence_length",
+    "load_tokenizer",
+    "prepare_encodings_inputs",
+)
+
+
+type NumpyArray = np.ndarray
+
+_SEQUENCE_BUCKET: int = 8
+
+
+def prepare_encodings_inputs(
+    encodings: Sequence[Encoding],
+    /,
+    *,
+    pad_token_id: int,
+    buffers: ONNXBufferPool | None = None,
+    max_length: int | None = None,
+) -> tuple[NumpyArray, NumpyArray]:
+    # Prepare inputs padded to the longest element
+    sequence_length: int = max((len(encoding.ids) for encoding in encodings), default=0)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+    input_ids: NumpyArray
+    attention_mask: NumpyArray
+    if buffers is not None:
+        input_ids, attention_mask = acquire_inputs(
+            buffers,
+            rows=len(encodings),
+            sequence_length=sequence_length,
+            pad_token_id=pad_token_id,
+            max_length=max_length,
+        )
+
+    else:
+        input_ids = np.full(
+            (len(encodings), sequence_length),
+            pad_token_id,
+            dtype=np.int64,
+        )
+        attention_mask = np.zeros(
+            (len(encodings), sequence_length),
+            dtype=np.int64,
+        )
+
+    for row, encoding in enumerate(encodings):
+        input_ids[row, : len(encoding.ids)] = encoding.ids  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+        attention_mask[row, : len(encoding.attention_mask)] = encoding.attention_mask  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+    return (input_ids, attention_mask)
+
+
+def acquire_inputs(
+    buffers: ONNXBufferPool,
+    /,
+    *,
+    rows: int,
+    sequence_length: int,
+    pad_token_id: int,
+    max_length: int | None,
+) -> tuple[NumpyArray, NumpyArray]:
+    # sequence length is bucketed so that consecutive batches reuse the same buffers,
+    # additional columns are masked padding but can't exceed positions supported by the model
+    bucketed_length: int = bucket_size(sequence_length, granularity=_SEQUENCE_BUCKET)
+    if max_length is not None:
+        bucketed_length = max(sequence_length, min(bucketed_length, max_length))
+
+    shape: tuple[int, int] = (rows, bucketed_length)
+    input_ids: NumpyArray = buffers.acquire(shape, dtype=np.int64)
+    input_ids.fill(pad_token_id)
+    attention_mask: NumpyArray = buffers.acquire(shape, dtype=np.int64)
+    attention_mask.fill(0)
+    return (input_ids, attention_mask)
+
+
+def load_sequence_length(
+    tokenizer: Tokenizer,
+    /,
+) -> int | None:
+    truncation: dict[str, Any] | None = tokenizer.truncation  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+    if truncation is None:
+        return None
+
+    return truncation["max_length"]
+
+
+def _load_tokenizer_special_tokens(model_dir: Path) -> dict[str, Any] | None:
+    tokens_map_path = model_dir / "special_tokens_map.json"
+    if not tokens_map_path.exists():
+        return None
+
+    with open(str(tokens_map_path)) as file:
+        tokens_map: dict[str, Any] = json.load(file)
+        return tokens_map
+
+
+def load_pad_token_id(model_dir: Path) -> int:
+    config_path = model_dir / "config.json"
+    if not config_path.exists():
+        raise ValueError(f"Missing config.json at {model_dir}")
+
+    with open(str(config_path)) as file:
+        config: dict[str, Any] = json.load(file)
+        return config.get("pad_token_id", 0)
+
+
+def _load_tokenizer_max_length(model_dir: Path) -> int:
+    config_path = model_dir / "tokenizer_config.json"
+    if not config_path.exists():
+        raise ValueError(f"Missing tokenizer_config.json at {model_dir}")
+
+    with open(str(config_path)) as file:
+        tokenizer_config: dict[str, Any] = json.load(file)
+        if "model_max_length" not in tokenizer_config:
+            return tokenizer_config["max_length"]
+
+        elif "max_length" not in tokenizer_config:
+            return tokenizer_config["model_max_length"]
+
+        else:
+            return min(tokenizer_config["model_max_length"], tokenizer_config["max_length"])
+
+
+def load_tokenizer(
+    model_dir: Path,
+    *,
+    window_overlap: int,
+) -> Tokenizer:
+    tokenizer_path = model_dir / "tokenizer.json"
+    if not tokenizer_path.exists():
+        raise ValueError(f"Missing tokenizer.json at {model_dir}")
+
+    tokenizer = Tokenizer.from_file(str(tokenizer_path))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+
+    # truncated tokens are kept as overflowing windows sharing window_overlap tokens
+    tokenizer.enable_truncation(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+        max_length=_load_tokenizer_max_length(model_dir),
+        stride=window_overlap,
+    )
+    # padding is applied per batch, see prepare_encodings_inputs
+    tokenizer.no_padding()  # pyright: ignore[reportUnknownMemberType]
+
+    if tokens_map := _load_tokenizer_special_tokens(model_dir):
+        for token in tokens_map.values():
+            if isinstance(token, str):
+                tokenizer.add_special_tokens([token])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+
+            elif isinstance(token, dict):
+                tokenizer.add_special_tokens([AddedToken(**token)])  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
+
+    return tokenizer  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType, reportUnknownArgumentType]
@@ -1,10 +1,15 @@
-from typing import Any, Literal
+from collections.abc import Sequence
+from typing import Any, Literal, Protocol, runtime_checkable
 
 import onnxruntime as onnx
 
 __all__ = (
+    "ONNXEmbeddingPooling",
     "ONNXExcetion",
     "ONNXExecutionProvider",
+    "ONNXLongTextStrategy",
+    "ONNXOverloaded",
+    "ONNXPassagesScoring",
     "ONNXSessionOptions",
 )
 
@@ -13,6 +18,10 @@ class ONNXExcetion(Exception):
     pass
 
 
+class ONNXOverloaded(ONNXExcetion):
+    pass
+
+
 type ONNXExecutionProviderName = (
     Literal[
         "ROCMExecutionProvider",
@@ -26,4 +35,26 @@ type ONNXExecutionProviderName = (
 type ONNXExecutionProvider = (
     ONNXExecutionProviderName | tuple[ONNXExecutionProviderName, dict[str, Any]]
 )
+type ONNXEmbeddingPooling = Literal[
+    "cls",
+    "mean",
+    "max",
+]
+type ONNXLongTextStrategy = Literal[
+    "truncate",
+    "mean",
+    "max",
+]
 type ONNXSessionOptions = onnx.SessionOptions  # pyright: ignore[reportUnknownMemberType]
+
+
+@runtime_checkable
+class ONNXPassagesScoring(Protocol):
+    async def __call__(
+        self,
+        query: str,
+        passages: Sequence[str],
+        /,
+        *,
+        top_k: int | None,
+    ) -> Sequence[tuple[int, float]]: ...
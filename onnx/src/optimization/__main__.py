@@ -0,0 +1,97 @@
+import argparse
+import json
+from asyncio import run
+from pathlib import Path
+from typing import Any
+
+from draive import ctx, setup_logging
+
+from optimization.export import optimize_model, quantize_model
+from optimization.report import compare_models, load_corpus, save_report
+
+
+async def optimize(
+    model_dir: Path,
+    /,
+    *,
+    corpus_path: Path | None,
+    execution_provider: str,
+    batch_size: int,
+) -> None:
+    async with ctx.scope("optimization"):
+        model_path: Path = model_dir / "model.onnx"
+        if not model_path.exists():
+            raise FileNotFoundError(f"onnx model not found at {model_path}")
+
+        optimized_path: Path = optimize_model(
+            model_path,
+            output_path=model_dir / "model.optimized.onnx",
+            execution_provider=execution_provider,
+        )
+        # quantize the original graph, fused nodes of optimized graphs quantize worse
+        quantized_path: Path = quantize_model(
+            model_path,
+            output_path=model_dir / "model.int8.onnx",
+        )
+        quantized_optimized_path: Path = optimize_model(
+            quantized_path,
+            output_path=model_dir / "model.int8.optimized.onnx",
+            execution_provider=execution_provider,
+        )
+
+        ctx.log_info("Comparing optimized models...")
+        report: dict[str, Any] = await compare_models(
+            model_path,
+            candidates=(
+                optimized_path,
+                quantized_optimized_path,
+            ),
+            corpus=load_corpus(corpus_path),
+            execution_provider=execution_provider,
+            batch_size=batch_size,
+        )
+        save_report(
+            report,
+            path=model_dir / "optimization_report.json",
+        )
+        print(json.dumps(report, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Prepare int8 quantized and graph optimized versions of an onnx model",
+    )
+    parser.add_argument(
+        "model_dir",
+        type=Path,
+        help="Directory containing model.onnx and tokenizer files",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        help="Text file with one sample text per line used for the comparison report",
+    )
+    parser.add_argument(
+        "--execution-provider",
+        default="CPUExecutionProvider",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+    )
+    arguments = parser.parse_args()
+
+    setup_logging("optimization")
+    run(
+        optimize(
+            arguments.model_dir,
+            corpus_path=arguments.corpus,
+            execution_provider=arguments.execution_provider,
+            batch_size=arguments.batch_size,
+        )
+    )
+
+
+main()
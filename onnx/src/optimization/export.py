@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import onnxruntime as onnx
+from draive import ctx
+
+__all__ = (
+    "optimize_model",
+    "quantize_model",
+)
+
+
+def optimize_model(
+    model_path: Path,
+    /,
+    *,
+    output_path: Path,
+    execution_provider: str,
+) -> Path:
+    ctx.log_info(f"Optimizing {model_path} graph...")
+    options = onnx.SessionOptions()  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
+    # extended optimizations stay portable, layout optimizations of ORT_ENABLE_ALL
+    # are specific to the hardware used and can't be saved, optimized files are loaded
+    # with optimizations disabled so those are not applied unless session options
+    # with ORT_ENABLE_ALL are provided when loading the model
+    options.graph_optimization_level = onnx.GraphOptimizationLevel.ORT_ENABLE_EXTENDED  # pyright: ignore
+    options.optimized_model_filepath = str(output_path)
+    # creating the session performs optimization and saves the result
+    onnx.InferenceSession(
+        str(model_path),
+        sess_options=options,  # pyright: ignore[reportUnknownArgumentType]
+        providers=[execution_provider],
+    )
+    ctx.log_info(f"...optimized model saved to {output_path}")
+    return output_path
+
+
+def quantize_model(
+    model_path: Path,
+    /,
+    *,
+    output_path: Path,
+) -> Path:
+    # quantization tools require onnx package, see the quantization extra
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # noqa: PLC0415
+
+    ctx.log_info(f"Quantizing {model_path} weights to int8...")
+    quantize_dynamic(
+        model_input=model_path,
+        model_output=output_path,
+        weight_type=QuantType.QInt8,
+    )
+    ctx.log_info(f"...quantized model saved to {output_path}")
+    return output_path
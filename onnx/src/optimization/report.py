@@ -0,0 +1,158 @@
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+from draive import ctx
+
+from integrations.onnx import ONNXEmbeddingConfig, ONNXEmbeddingModel
+
+__all__ = (
+    "compare_models",
+    "load_corpus",
+    "save_report",
+)
+
+
+type NumpyArray = np.ndarray
+
+SAMPLE_CORPUS: Sequence[str] = (
+    "Lorem ipsum dolor sit amet",
+    "More things to embed",
+    "Using locally running model",
+    "Quantized models trade a little precision for a lot of speed.",
+    "Vector search returns documents which are semantically close to the query.",
+    "The quick brown fox jumps over the lazy dog near the river bank at dawn.",
+    "Embedding models map text of any length into vectors of a fixed size.",
+    "Short",
+)
+
+
+def load_corpus(
+    path: Path | None,
+    /,
+) -> Sequence[str]:
+    if path is None:
+        return SAMPLE_CORPUS
+
+    with open(path) as file:
+        return tuple(line.strip() for line in file if line.strip())
+
+
+async def compare_models(
+    reference_path: Path,
+    /,
+    *,
+    candidates: Sequence[Path],
+    corpus: Sequence[str],
+    execution_provider: str,
+    batch_size: int,
+) -> dict[str, Any]:
+    config = ONNXEmbeddingConfig(batch_size=batch_size)
+    reference, reference_stats = await _measure(
+        reference_path,
+        corpus=corpus,
+        config=config,
+        execution_provider=execution_provider,
+        optimized=False,
+    )
+    report: dict[str, Any] = {
+        "corpus_size": len(corpus),
+        "batch_size": batch_size,
+        "reference": {
+            "model": str(reference_path),
+            **reference_stats,
+        },
+        "candidates": [],
+    }
+
+    for candidate_path in candidates:
+        embeddings, stats = await _measure(
+            candidate_path,
+            corpus=corpus,
+            config=config,
+            execution_provider=execution_provider,
+            optimized=True,
+        )
+        agreement: NumpyArray = _cosine_agreement(reference, embeddings)
+        report["candidates"].append(
+            {
+                "model": str(candidate_path),
+                **stats,
+                "speedup": reference_stats["duration_s"] / stats["duration_s"],
+                "cosine_mean": float(agreement.mean()),
+                "cosine_min": float(agreement.min()),
+            }
+        )
+
+    return report
+
+
+async def _measure(
+    model_path: Path,
+    /,
+    *,
+    corpus: Sequence[str],
+    config: ONNXEmbeddingConfig,
+    execution_provider: str,
+    optimized: bool,
+) -> tuple[NumpyArray, dict[str, Any]]:
+    model = ONNXEmbeddingModel(
+        model_path,
+        execution_provider=execution_provider,
+        optimized=optimized,
+    )
+    async with model:
+        await model.embed_texts(corpus[: config.batch_size], config=config)  # warm up
+
+        latencies: list[float] = []
+        batches: list[NumpyArray] = []
+        started: float = perf_counter()
+        for offset in range(0, len(corpus), config.batch_size):
+            batch_started: float = perf_counter()
+            batches.append(
+                await model.embed_texts(
+                    corpus[offset : offset + config.batch_size],
+                    config=config,
+                )
+            )
+            latencies.append(perf_counter() - batch_started)
+
+        duration: float = perf_counter() - started
+
+    ctx.log_info(f"...{model_path} embedded {len(corpus)} texts in {duration:.3f}s")
+    return (
+        np.concatenate(batches),
+        {
+            "model_size_mb": model_path.stat().st_size / (1024 * 1024),
+            "duration_s": duration,
+            "latency_p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "latency_p95_ms": float(np.percentile(latencies, 95) * 1000),
+            "texts_per_second": len(corpus) / duration,
+        },
+    )
+
+
+def _cosine_agreement(
+    reference: NumpyArray,
+    candidate: NumpyArray,
+    /,
+) -> NumpyArray:
+    reference_norms: NumpyArray = np.linalg.norm(reference, axis=1)
+    candidate_norms: NumpyArray = np.linalg.norm(candidate, axis=1)
+    return np.einsum("ij,ij->i", reference, candidate) / np.maximum(
+        reference_norms * candidate_norms,
+        np.finfo(np.float32).tiny,
+    )
+
+
+def save_report(
+    report: dict[str, Any],
+    /,
+    *,
+    path: Path,
+) -> None:
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
@@ -0,0 +1 @@
+# do not expose symbols here, let it be used through submodules
@@ -0,0 +1,7 @@
+from solutions.embedding_cache.cache import EmbeddingCache
+from solutions.embedding_cache.embedding import CachedTextEmbedding
+
+__all__ = (
+    "CachedTextEmbedding",
+    "EmbeddingCache",
+)
@@ -0,0 +1,321 @@
+import json
+import os
+from collections import OrderedDict
+from hashlib import blake2b
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import numpy as np
+from draive import ctx
+
+__all__ = ("EmbeddingCache",)
+
+
+type NumpyArray = np.ndarray
+
+
+class EmbeddingCache:
+    __slots__ = (
+        "_disk",
+        "_hits",
+        "_memory",
+        "_memory_limit",
+        "_misses",
+    )
+
+    def __init__(
+        self,
+        *,
+        memory_limit: int = 4096,
+        directory: Path | str | None = None,
+        disk_limit: int = 65536,
+    ) -> None:
+        assert memory_limit > 0  # nosec: B101
+        assert disk_limit > 0  # nosec: B101
+        self._memory_limit: int = memory_limit
+        self._memory: OrderedDict[str, NumpyArray] = OrderedDict()
+        self._disk: _DiskCache | None
+        if directory is not None:
+            self._disk = _DiskCache(
+                Path(directory),
+                limit=disk_limit,
+            )
+
+        else:
+            self._disk = None
+
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def key(
+        self,
+        text: str,
+        /,
+        *,
+        identifier: str,
+    ) -> str:
+        # identifier has to cover the model and any config affecting produced vectors
+        digest = blake2b(identifier.encode(), digest_size=16)
+        digest.update(b"\x00")
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get(
+        self,
+        key: str,
+        /,
+    ) -> NumpyArray | None:
+        if (vector := self._memory.get(key)) is not None:
+            self._memory.move_to_end(key)
+            self._hits += 1
+            return vector
+
+        if self._disk is not None and (vector := self._disk.get(key)) is not None:
+            self._store_in_memory(key, vector)
+            self._hits += 1
+            return vector
+
+        self._misses += 1
+        return None
+
+    def put(
+        self,
+        key: str,
+        /,
+        vector: NumpyArray,
+    ) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        self._store_in_memory(key, vector)
+        if self._disk is not None:
+            self._disk.put(key, vector)
+
+    def _store_in_memory(
+        self,
+        key: str,
+        vector: NumpyArray,
+        /,
+    ) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_limit:
+            self._memory.popitem(last=False)
+
+    async def __aenter__(self) -> None:
+        if self._disk is not None:
+            self._disk.load()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        ctx.record_info(
+            metric="embedding.cache.hits",
+            value=self._hits,
+            kind="counter",
+        )
+        ctx.record_info(
+            metric="embedding.cache.misses",
+            value=self._misses,
+            kind="counter",
+        )
+        if self._disk is not None:
+            self._disk.flush()
+
+
+class _DiskCache:
+    __slots__ = (
+        "_directory",
+        "_free_slots",
+        "_index",
+        "_limit",
+        "_next_slot",
+        "_stamps",
+        "_vectors",
+    )
+
+    def __init__(
+        self,
+        directory: Path,
+        /,
+        *,
+        limit: int,
+    ) -> None:
+        self._directory: Path = directory
+        self._limit: int = limit
+        # insertion order of the index is used as the recently used order
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._free_slots: list[int] = []
+        # slots from the next one on were never used
+        self._next_slot: int = 0
+        self._vectors: NumpyArray | None = None
+        # each slot is stamped with the key of its vector, index is written only on flush
+        # and may be stale after a crash, stamps are verified before returning vectors
+        self._stamps: NumpyArray | None = None
+
+    @property
+    def _index_path(self) -> Path:
+        return self._directory / "index.json"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._directory / "vectors.f32"
+
+    @property
+    def _stamps_path(self) -> Path:
+        return self._directory / "stamps.bin"
+
+    def load(self) -> None:
+        if not (
+            self._index_path.exists()
+            and self._vectors_path.exists()
+            and self._stamps_path.exists()
+        ):
+            return  # nothing stored yet
+
+        with open(self._index_path) as file:
+            index: dict[str, Any] = json.load(file)
+
+        if index.get("limit") != self._limit:
+            ctx.log_warning("Embedding cache limit changed, dropping stored vectors...")
+            return
+
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(self._limit, index["dimension"]),
+        )
+        self._stamps = np.memmap(
+            self._stamps_path,
+            dtype=np.uint8,
+            mode="r+",
+            shape=(self._limit, _STAMP_SIZE),
+        )
+        self._index = OrderedDict(index["slots"])
+        # slots released before the index was stored are not listed, they are free again
+        self._next_slot = max(self._index.values(), default=-1) + 1
+        used_slots: set[int] = set(self._index.values())
+        self._free_slots = [slot for slot in range(self._next_slot) if slot not in used_slots]
+
+    def flush(self) -> None:
+        if self._vectors is None or self._stamps is None:
+            return  # nothing to store
+
+        self._vectors.flush()  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        self._stamps.flush()  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+        # replace the index atomically to avoid leaving a broken file behind
+        temporary_path: Path = self._index_path.with_suffix(".tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(
+                {
+                    "limit": self._limit,
+                    "dimension": self._vectors.shape[1],
+                    "slots": list(self._index.items()),
+                },
+                file,
+            )
+
+        os.replace(temporary_path, self._index_path)
+
+    def get(
+        self,
+        key: str,
+        /,
+    ) -> NumpyArray | None:
+        if self._vectors is None or self._stamps is None:
+            return None
+
+        slot: int | None = self._index.get(key)
+        if slot is None:
+            return None
+
+        if self._stamps[slot].tobytes() != _stamp(key):
+            # slot was reused after the index was last stored, vector belongs to other key
+            del self._index[key]
+            self._free_slots.append(slot)
+            return None
+
+        self._index.move_to_end(key)
+        return np.array(self._vectors[slot])
+
+    def put(
+        self,
+        key: str,
+        /,
+        vector: NumpyArray,
+    ) -> None:
+        vectors, stamps = self._prepare_vectors(dimension=vector.shape[0])
+        if vectors.shape[1] != vector.shape[0]:
+            raise ValueError(
+                f"Embedding cache dimension mismatch: {vector.shape[0]} != {vectors.shape[1]}"
+            )
+
+        slot: int
+        if key in self._index:
+            slot = self._index[key]
+            self._index.move_to_end(key)
+
+        elif self._free_slots:
+            slot = self._free_slots.pop()
+            self._index[key] = slot
+
+        elif self._next_slot < self._limit:
+            slot = self._next_slot
+            self._next_slot += 1
+            self._index[key] = slot
+
+        else:  # evict least recently used vector and reuse its slot
+            _, slot = self._index.popitem(last=False)
+            self._index[key] = slot
+
+        # slot is invalidated while being rewritten, stamped again when the vector is complete
+        stamps[slot] = 0
+        vectors[slot] = vector
+        stamps[slot] = np.frombuffer(_stamp(key), dtype=np.uint8)
+
+    def _prepare_vectors(
+        self,
+        *,
+        dimension: int,
+    ) -> tuple[NumpyArray, NumpyArray]:
+        if self._vectors is not None and self._stamps is not None:
+            return (self._vectors, self._stamps)
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="w+",
+            shape=(self._limit, dimension),
+        )
+        self._stamps = np.memmap(
+            self._stamps_path,
+            dtype=np.uint8,
+            mode="w+",
+            shape=(self._limit, _STAMP_SIZE),
+        )
+        self._index = OrderedDict()
+        self._free_slots = []
+        self._next_slot = 0
+        return (self._vectors, self._stamps)
+
+
+_STAMP_SIZE: int = 16
+
+
+def _stamp(
+    key: str,
+    /,
+) -> bytes:
+    return blake2b(key.encode(), digest_size=_STAMP_SIZE).digest()
@@ -0,0 +1,80 @@
+import json
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any, cast
+
+import numpy as np
+from draive import DataModel, Embedded, State, TextEmbedding, as_list
+
+from solutions.embedding_cache.cache import EmbeddingCache, NumpyArray
+
+__all__ = ("CachedTextEmbedding",)
+
+
+def CachedTextEmbedding(
+    embedding: TextEmbedding,
+    /,
+    *,
+    cache: EmbeddingCache,
+    identifier: str,
+    config_key: Callable[[], Hashable],
+) -> TextEmbedding:
+    async def embed_texts[Value: DataModel | State](
+        values: Sequence[Value] | Sequence[str],
+        /,
+        attribute: Callable[[Value], str] | None = None,
+        **extra: Any,
+    ) -> Sequence[Embedded[Value]] | Sequence[Embedded[str]]:
+        texts: list[str]
+        if attribute is None:
+            texts = cast(list[str], as_list(values))
+
+        else:
+            texts = [attribute(cast(Value, value)) for value in values]
+
+        # vectors depend on the provider config (i.e. dimensions) which lives in provider
+        # specific states or is passed with extra arguments, both are part of the key
+        config_identifier: str = json.dumps(
+            {
+                "identifier": identifier,
+                "config": config_key(),
+                "extra": extra,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        keys: list[str] = [cache.key(text, identifier=config_identifier) for text in texts]
+        vectors: list[NumpyArray | None] = [cache.get(key) for key in keys]
+        missing: list[int] = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # only texts which were not cached are embedded, duplicates are embedded once
+            missing_texts: dict[str, None] = dict.fromkeys(texts[index] for index in missing)
+            embedded: Sequence[Embedded[str]] = await embedding.embedding(
+                list(missing_texts),
+                **extra,
+            )
+            computed: dict[str, NumpyArray] = {
+                element.value: np.asarray(element.vector, dtype=np.float32)
+                for element in embedded
+            }
+            for index in missing:
+                vector: NumpyArray = computed[texts[index]]
+                cache.put(keys[index], vector)
+                vectors[index] = vector
+
+        return cast(
+            Sequence[Embedded[Value]] | Sequence[Embedded[str]],
+            [
+                Embedded(
+                    value=value,
+                    vector=cast(NumpyArray, vector).tolist(),
+                )
+                for value, vector in zip(
+                    values,
+                    vectors,
+                    strict=True,
+                )
+            ],
+        )
+
+    return TextEmbedding(embedding=embed_texts)
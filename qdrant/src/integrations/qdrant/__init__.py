@@ -1,17 +1,38 @@
 from integrations.qdrant.client import QdrantClient
+from integrations.qdrant.sparse import sparse_document_vector, sparse_query_vector
 from integrations.qdrant.state import Qdrant
 from integrations.qdrant.types import (
+    QdrantBinaryQuantization,
     QdrantException,
+    QdrantHNSWConfig,
     QdrantPaginationResult,
     QdrantPaginationToken,
+    QdrantPointIdentifier,
+    QdrantProductQuantization,
+    QdrantQuantization,
+    QdrantRecord,
     QdrantResult,
+    QdrantScalarQuantization,
+    QdrantSearchConfig,
+    QdrantSparseVector,
 )
 
 __all__ = [
     "Qdrant",
+    "QdrantBinaryQuantization",
     "QdrantClient",
     "QdrantException",
+    "QdrantHNSWConfig",
     "QdrantPaginationResult",
     "QdrantPaginationToken",
+    "QdrantPointIdentifier",
+    "QdrantProductQuantization",
+    "QdrantQuantization",
+    "QdrantRecord",
     "QdrantResult",
+    "QdrantScalarQuantization",
+    "QdrantSearchConfig",
+    "QdrantSparseVector",
+    "sparse_document_vector",
+    "sparse_query_vector",
 ]
@@ -25,7 +25,10 @@ class QdrantClient(
             collection_index_creating=self.create_index,
             storing=self.store,
             fetching=self.fetch,
+            iterating=self.iterate,
             searching=self.search,
+            hybrid_searching=self.search_hybrid,
+            batch_searching=self.search_many,
             deleting=self.delete,
         )
 
@@ -0,0 +1,23 @@
+from collections.abc import Sequence
+
+from qdrant_client.models import PayloadSelector, PayloadSelectorExclude, PayloadSelectorInclude
+
+__all__ = [
+    "prepare_payload_selector",
+]
+
+
+def prepare_payload_selector(
+    *,
+    include: Sequence[str] | None,
+    exclude: Sequence[str] | None,
+) -> PayloadSelector | bool:
+    assert include is None or exclude is None, "Can't both include and exclude payload fields"  # nosec: B101
+    if include is not None:
+        return PayloadSelectorInclude(include=list(include))
+
+    elif exclude is not None:
+        return PayloadSelectorExclude(exclude=list(exclude))
+
+    else:
+        return True
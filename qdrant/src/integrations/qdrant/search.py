@@ -1,11 +1,31 @@
 from collections.abc import Sequence
+from typing import cast
 
-from draive import AttributeRequirement, DataModel, as_list
+from draive import AttributeRequirement, DataModel, as_list, ctx
 from qdrant_client.conversions.common_types import ScoredPoint
+from qdrant_client.models import (
+    Filter,
+    Fusion,
+    FusionQuery,
+    NamedVector,
+    Prefetch,
+    QueryResponse,
+    SearchParams,
+    SearchRequest,
+    SparseVector,
+)
 
 from integrations.qdrant.filters import prepare_filter
+from integrations.qdrant.projection import prepare_payload_selector
 from integrations.qdrant.session import QdrantSession
-from integrations.qdrant.types import QdrantResult
+from integrations.qdrant.sparse import DENSE_VECTOR, SPARSE_VECTOR
+from integrations.qdrant.tuning import prepare_search_params
+from integrations.qdrant.types import (
+    QdrantRecord,
+    QdrantResult,
+    QdrantSearchConfig,
+    QdrantSparseVector,
+)
 
 __all__ = [
     "QdrantSearchMixin",
@@ -22,30 +42,202 @@ class QdrantSearchMixin(QdrantSession):
         requirements: AttributeRequirement[Model] | None,
         score_threshold: float | None,
         limit: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
         return_vector: bool,
-    ) -> Sequence[QdrantResult[Model]] | Sequence[Model]:
+    ) -> Sequence[QdrantResult[Model]] | Sequence[Model] | Sequence[QdrantRecord[Model]]:
         results: list[ScoredPoint] = await self._client.search(
             collection_name=model.__name__,
             query_filter=prepare_filter(
                 requirements=requirements,
             ),
-            query_vector=as_list(query_vector),
+            query_vector=_query_vector(
+                query_vector,
+                name=await self._dense_vector(model.__name__),
+            ),
             score_threshold=score_threshold,
             limit=limit,
-            with_payload=True,
+            search_params=prepare_search_params(ctx.state(QdrantSearchConfig)),
+            with_payload=prepare_payload_selector(
+                include=include,
+                exclude=exclude,
+            ),
             with_vectors=return_vector,
         )
 
-        if return_vector:
+        if include is not None or exclude is not None:
+            # projected payloads are decoded lazily, only when accessed
             return tuple(
-                QdrantResult[model].of(
+                QdrantRecord.of(
                     model,
                     data=result,
                 )
                 for result in results
             )
 
+        return _search_results(
+            model,
+            results=results,
+            return_vector=return_vector,
+        )
+
+    async def search_hybrid[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        query_sparse_vector: QdrantSparseVector | None,
+        requirements: AttributeRequirement[Model] | None,
+        score_threshold: float | None,
+        limit: int,
+        prefetch_limit: int | None,
+        return_vector: bool,
+    ) -> Sequence[QdrantResult[Model]] | Sequence[Model]:
+        query_filter: Filter | None = prepare_filter(
+            requirements=requirements,
+        )
+        search_params: SearchParams | None = prepare_search_params(
+            ctx.state(QdrantSearchConfig)
+        )
+        response: QueryResponse
+        if query_sparse_vector is None:
+            # dense only search within a collection using named vectors
+            response = await self._client.query_points(
+                collection_name=model.__name__,
+                query=as_list(query_vector),
+                using=DENSE_VECTOR,
+                query_filter=query_filter,
+                search_params=search_params,
+                score_threshold=score_threshold,
+                limit=limit,
+                with_payload=True,
+                with_vectors=[DENSE_VECTOR] if return_vector else False,
+            )
+
         else:
-            return tuple(
-                model(**result.payload) for result in results if result.payload is not None
+            # both candidate lists are fused server side with reciprocal rank fusion,
+            # score threshold applies to dense similarity as fused scores are rank based
+            response = await self._client.query_points(
+                collection_name=model.__name__,
+                prefetch=[
+                    Prefetch(
+                        query=as_list(query_vector),
+                        using=DENSE_VECTOR,
+                        filter=query_filter,
+                        params=search_params,
+                        score_threshold=score_threshold,
+                        limit=prefetch_limit or limit * 4,
+                    ),
+                    Prefetch(
+                        query=SparseVector(
+                            indices=as_list(query_sparse_vector.indices),
+                            values=as_list(query_sparse_vector.values),
+                        ),
+                        using=SPARSE_VECTOR,
+                        filter=query_filter,
+                        limit=prefetch_limit or limit * 4,
+                    ),
+                ],
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=limit,
+                with_payload=True,
+                with_vectors=[DENSE_VECTOR] if return_vector else False,
             )
+
+        return _search_results(
+            model,
+            results=response.points,
+            return_vector=return_vector,
+        )
+
+    async def search_many[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        requirements: AttributeRequirement[Model] | None,
+        score_threshold: float | None,
+        limit: int,
+        return_vector: bool,
+    ) -> Sequence[Sequence[QdrantResult[Model]]] | Sequence[Sequence[Model]]:
+        if not query_vectors:
+            return ()
+
+        query_filter: Filter | None = prepare_filter(
+            requirements=requirements,
+        )
+        search_params: SearchParams | None = prepare_search_params(
+            ctx.state(QdrantSearchConfig)
+        )
+        vector_name: str | None = await self._dense_vector(model.__name__)
+        # all queries are sent within a single request
+        results: list[list[ScoredPoint]] = await self._client.search_batch(
+            collection_name=model.__name__,
+            requests=[
+                SearchRequest(
+                    vector=_query_vector(
+                        query_vector,
+                        name=vector_name,
+                    ),
+                    filter=query_filter,
+                    score_threshold=score_threshold,
+                    limit=limit,
+                    params=search_params,
+                    with_payload=True,
+                    with_vector=return_vector,
+                )
+                for query_vector in query_vectors
+            ],
+        )
+
+        return cast(
+            Sequence[Sequence[QdrantResult[Model]]] | Sequence[Sequence[Model]],
+            tuple(
+                _search_results(
+                    model,
+                    results=query_results,
+                    return_vector=return_vector,
+                )
+                for query_results in results
+            ),
+        )
+
+
+def _query_vector(
+    vector: Sequence[float],
+    /,
+    *,
+    name: str | None,
+) -> NamedVector | list[float]:
+    if name is None:
+        return as_list(vector)
+
+    # collections with named vectors require selecting the one to search
+    return NamedVector(
+        name=name,
+        vector=as_list(vector),
+    )
+
+
+def _search_results[Model: DataModel](
+    model: type[Model],
+    /,
+    *,
+    results: Sequence[ScoredPoint],
+    return_vector: bool,
+) -> Sequence[QdrantResult[Model]] | Sequence[Model]:
+    if return_vector:
+        return tuple(
+            QdrantResult[model].of(
+                model,
+                data=result,
+            )
+            for result in results
+        )
+
+    else:
+        return tuple(
+            model(**result.payload) for result in results if result.payload is not None
+        )
@@ -1,8 +1,11 @@
 from typing import Literal, overload
 
 from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import CollectionInfo, VectorParams
 
 from integrations.qdrant.config import QDRANT_HOST, QDRANT_PORT
+from integrations.qdrant.sparse import DENSE_VECTOR
+from integrations.qdrant.types import QdrantException
 
 __all__ = [
     "QdrantSession",
@@ -12,6 +15,7 @@ __all__ = [
 class QdrantSession:
     __slots__ = (
         "_client",
+        "_dense_vectors",
         "_host",
         "_in_memory",
         "_port",
@@ -48,6 +52,8 @@ class QdrantSession:
         self._ssl = ssl
         self._in_memory = in_memory
         self._client: AsyncQdrantClient = self._prepare_client()
+        # dense vector name used by each collection, None for unnamed vectors
+        self._dense_vectors: dict[str, str | None] = {}
 
     def _prepare_client(self) -> AsyncQdrantClient:
         if self._in_memory:
@@ -66,6 +72,29 @@ class QdrantSession:
     async def _open_session(self) -> None:
         await self._client.close()
         self._client = self._prepare_client()
+        self._dense_vectors.clear()
+
+    async def _dense_vector(
+        self,
+        collection: str,
+        /,
+    ) -> str | None:
+        if collection not in self._dense_vectors:
+            info: CollectionInfo = await self._client.get_collection(collection_name=collection)
+            # collections prepared for hybrid search keep the dense vector under its name
+            match info.config.params.vectors:
+                case VectorParams():
+                    self._dense_vectors[collection] = None
+
+                case {"dense": VectorParams()}:
+                    self._dense_vectors[collection] = DENSE_VECTOR
+
+                case _:
+                    raise QdrantException(
+                        f"Collection {collection} has no {DENSE_VECTOR} vector to search"
+                    )
+
+        return self._dense_vectors[collection]
 
     async def _close_session(self) -> None:
         await self._client.close()
@@ -0,0 +1,57 @@
+import re
+from collections import Counter
+from collections.abc import Mapping
+from zlib import crc32
+
+from integrations.qdrant.types import QdrantSparseVector
+
+__all__ = [
+    "DENSE_VECTOR",
+    "SPARSE_VECTOR",
+    "sparse_document_vector",
+    "sparse_query_vector",
+]
+
+# names of vectors in collections created with sparse vectors
+DENSE_VECTOR: str = "dense"
+SPARSE_VECTOR: str = "sparse"
+
+_TOKEN_PATTERN: re.Pattern[str] = re.compile(r"\w+")
+
+
+def sparse_document_vector(
+    text: str,
+    /,
+    *,
+    k1: float = 1.2,
+    b: float = 0.75,
+    average_length: float = 256.0,
+) -> QdrantSparseVector:
+    # BM25 term frequency part, inverse document frequency is applied by qdrant (Modifier.IDF)
+    terms: Mapping[int, int] = _term_counts(text)
+    length: int = sum(terms.values())
+    saturation: float = k1 * (1.0 - b + b * length / average_length)
+    return QdrantSparseVector(
+        indices=tuple(terms.keys()),
+        values=tuple(count * (k1 + 1.0) / (count + saturation) for count in terms.values()),
+    )
+
+
+def sparse_query_vector(
+    text: str,
+    /,
+) -> QdrantSparseVector:
+    # query terms are weighted equally, documents are scored by their own term weights
+    terms: Mapping[int, int] = _term_counts(text)
+    return QdrantSparseVector(
+        indices=tuple(terms.keys()),
+        values=(1.0,) * len(terms),
+    )
+
+
+def _term_counts(
+    text: str,
+    /,
+) -> Mapping[int, int]:
+    # terms are hashed into indices, no vocabulary has to be built or stored
+    return Counter(crc32(token.encode()) for token in _TOKEN_PATTERN.findall(text.lower()))
@@ -1,18 +1,26 @@
-from collections.abc import Iterable, Sequence
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Sequence
 from typing import Literal, overload
 
 from draive import AttributePath, AttributeRequirement, DataModel, Embedded, State, ctx
 
 from integrations.qdrant.types import (
+    QdrantBatchSearching,
     QdrantCollectionCreating,
     QdrantCollectionDeleting,
     QdrantCollectionIndexCreating,
     QdrantDeleting,
     QdrantFetching,
+    QdrantHNSWConfig,
+    QdrantHybridSearching,
+    QdrantIterating,
     QdrantPaginationResult,
     QdrantPaginationToken,
+    QdrantPointIdentifier,
+    QdrantQuantization,
+    QdrantRecord,
     QdrantResult,
     QdrantSearching,
+    QdrantSparseVector,
     QdrantStoring,
 )
 
@@ -23,19 +31,25 @@ __all__ = [
 
 class Qdrant(State):
     @classmethod
-    async def create_collection[Model: DataModel](
+    async def create_collection[Model: DataModel](  # noqa: PLR0913
         cls,
         model: type[Model],
         /,
         *,
         vector_size: int,
         in_ram: bool = False,
+        hnsw: QdrantHNSWConfig | None = None,
+        quantization: QdrantQuantization | None = None,
+        sparse_vectors: bool = False,
         skip_existing: bool = False,
     ) -> bool:
         return await ctx.state(cls).collection_creating(
             model,
             vector_size=vector_size,
             in_ram=in_ram,
+            hnsw=hnsw,
+            quantization=quantization,
+            sparse_vectors=sparse_vectors,
             skip_existing=skip_existing,
         )
 
@@ -96,22 +110,79 @@ class Qdrant(State):
         continuation: QdrantPaginationToken | None = None,
     ) -> QdrantPaginationResult[Model]: ...
 
+    @overload
     @classmethod
-    async def fetch[Model: DataModel](
+    async def fetch[Model: DataModel](  # noqa: PLR0913
         cls,
         model: type[Model],
         /,
         *,
         requirements: AttributeRequirement[Model] | None = None,
+        limit: int = 32,
         continuation: QdrantPaginationToken | None = None,
+        include: Sequence[str],
+        return_vector: bool = False,
+    ) -> QdrantPaginationResult[QdrantRecord[Model]]: ...
+
+    @overload
+    @classmethod
+    async def fetch[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        requirements: AttributeRequirement[Model] | None = None,
         limit: int = 32,
+        continuation: QdrantPaginationToken | None = None,
+        exclude: Sequence[str],
         return_vector: bool = False,
-    ) -> QdrantPaginationResult[Embedded[Model]] | QdrantPaginationResult[Model]:
+    ) -> QdrantPaginationResult[QdrantRecord[Model]]: ...
+
+    @classmethod
+    async def fetch[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        requirements: AttributeRequirement[Model] | None = None,
+        continuation: QdrantPaginationToken | None = None,
+        limit: int = 32,
+        include: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        return_vector: bool = False,
+    ) -> (
+        QdrantPaginationResult[Embedded[Model]]
+        | QdrantPaginationResult[Model]
+        | QdrantPaginationResult[QdrantRecord[Model]]
+    ):
         return await ctx.state(cls).fetching(
             model,
             requirements=requirements,
             continuation=continuation,
             limit=limit,
+            include=include,
+            exclude=exclude,
+            return_vector=return_vector,
+        )
+
+    @classmethod
+    def iterate[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        requirements: AttributeRequirement[Model] | None = None,
+        batch_size: int = 64,
+        include: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        return_vector: bool = False,
+    ) -> AsyncIterator[QdrantRecord[Model]]:
+        return ctx.state(cls).iterating(
+            model,
+            requirements=requirements,
+            batch_size=batch_size,
+            include=include,
+            exclude=exclude,
             return_vector=return_vector,
         )
 
@@ -141,6 +212,7 @@ class Qdrant(State):
         limit: int = 8,
     ) -> Sequence[Model]: ...
 
+    @overload
     @classmethod
     async def search[Model: DataModel](  # noqa: PLR0913
         cls,
@@ -151,27 +223,168 @@ class Qdrant(State):
         requirements: AttributeRequirement[Model] | None = None,
         score_threshold: float | None = None,
         limit: int = 8,
+        include: Sequence[str],
         return_vector: bool = False,
-    ) -> Sequence[QdrantResult[Model]] | Sequence[Model]:
+    ) -> Sequence[QdrantRecord[Model]]: ...
+
+    @overload
+    @classmethod
+    async def search[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        exclude: Sequence[str],
+        return_vector: bool = False,
+    ) -> Sequence[QdrantRecord[Model]]: ...
+
+    @classmethod
+    async def search[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        include: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        return_vector: bool = False,
+    ) -> Sequence[QdrantResult[Model]] | Sequence[Model] | Sequence[QdrantRecord[Model]]:
         return await ctx.state(cls).searching(
             model,
             query_vector=query_vector,
             requirements=requirements,
             score_threshold=score_threshold,
             limit=limit,
+            include=include,
+            exclude=exclude,
+            return_vector=return_vector,
+        )
+
+    @overload
+    @classmethod
+    async def search_hybrid[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        query_sparse_vector: QdrantSparseVector | None = None,
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        prefetch_limit: int | None = None,
+        return_vector: Literal[True],
+    ) -> Sequence[QdrantResult[Model]]: ...
+
+    @overload
+    @classmethod
+    async def search_hybrid[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        query_sparse_vector: QdrantSparseVector | None = None,
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        prefetch_limit: int | None = None,
+    ) -> Sequence[Model]: ...
+
+    @classmethod
+    async def search_hybrid[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        query_sparse_vector: QdrantSparseVector | None = None,
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        prefetch_limit: int | None = None,
+        return_vector: bool = False,
+    ) -> Sequence[QdrantResult[Model]] | Sequence[Model]:
+        return await ctx.state(cls).hybrid_searching(
+            model,
+            query_vector=query_vector,
+            query_sparse_vector=query_sparse_vector,
+            requirements=requirements,
+            score_threshold=score_threshold,
+            limit=limit,
+            prefetch_limit=prefetch_limit,
+            return_vector=return_vector,
+        )
+
+    @overload
+    @classmethod
+    async def search_many[Model: DataModel](
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        return_vector: Literal[True],
+    ) -> Sequence[Sequence[QdrantResult[Model]]]: ...
+
+    @overload
+    @classmethod
+    async def search_many[Model: DataModel](
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+    ) -> Sequence[Sequence[Model]]: ...
+
+    @classmethod
+    async def search_many[Model: DataModel](  # noqa: PLR0913
+        cls,
+        model: type[Model],
+        /,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        requirements: AttributeRequirement[Model] | None = None,
+        score_threshold: float | None = None,
+        limit: int = 8,
+        return_vector: bool = False,
+    ) -> Sequence[Sequence[QdrantResult[Model]]] | Sequence[Sequence[Model]]:
+        return await ctx.state(cls).batch_searching(
+            model,
+            query_vectors=query_vectors,
+            requirements=requirements,
+            score_threshold=score_threshold,
+            limit=limit,
             return_vector=return_vector,
         )
 
     @classmethod
-    async def store[Model: DataModel](
+    async def store[Model: DataModel](  # noqa: PLR0913
         cls,
         model: type[Model],
         /,
         *,
-        objects: Iterable[Embedded[Model]],
+        objects: Iterable[Embedded[Model]] | AsyncIterable[Embedded[Model]],
         batch_size: int = 64,
         max_retries: int = 3,
         parallel_tasks: int = 1,
+        progress: Callable[[int], None] | None = None,
+        identifier: QdrantPointIdentifier[Model] | None = None,
+        sparse_vector: Callable[[Model], QdrantSparseVector] | None = None,
+        skip_unchanged: bool = False,
     ) -> None:
         return await ctx.state(cls).storing(
             model,
@@ -179,6 +392,10 @@ class Qdrant(State):
             batch_size=batch_size,
             max_retries=max_retries,
             parallel_tasks=parallel_tasks,
+            progress=progress,
+            identifier=identifier,
+            sparse_vector=sparse_vector,
+            skip_unchanged=skip_unchanged,
         )
 
     @classmethod
@@ -198,6 +415,9 @@ class Qdrant(State):
     collection_deleting: QdrantCollectionDeleting
     collection_index_creating: QdrantCollectionIndexCreating
     fetching: QdrantFetching
+    iterating: QdrantIterating
     searching: QdrantSearching
+    hybrid_searching: QdrantHybridSearching
+    batch_searching: QdrantBatchSearching
     storing: QdrantStoring
     deleting: QdrantDeleting
@@ -1,21 +1,52 @@
-from collections.abc import Iterable, Sequence
-from typing import Literal, cast
-from uuid import uuid4
+import json
+from hashlib import blake2b
+from asyncio import ALL_COMPLETED, FIRST_COMPLETED, Task, create_task, sleep, wait
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Mapping,
+    Sequence,
+)
+from typing import Any, Literal, cast
+from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
-from draive import AttributePath, AttributeRequirement, DataModel, Embedded, as_list
+from draive import AttributePath, AttributeRequirement, DataModel, Embedded, as_list, ctx
 from qdrant_client.models import (
+    CollectionInfo,
     CollectionsResponse,
     Distance,
+    ExtendedPointId,
     Filter,
     FilterSelector,
+    Modifier,
     PayloadSchemaType,
+    PayloadSelector,
     PointStruct,
+    Record,
+    SparseIndexParams,
+    SparseVector,
+    SparseVectorParams,
     VectorParams,
+    VectorStruct,
 )
 
 from integrations.qdrant.filters import prepare_filter
+from integrations.qdrant.projection import prepare_payload_selector
 from integrations.qdrant.session import QdrantSession
-from integrations.qdrant.types import QdrantPaginationResult, QdrantPaginationToken
+from integrations.qdrant.sparse import DENSE_VECTOR, SPARSE_VECTOR
+from integrations.qdrant.tuning import prepare_hnsw_config, prepare_quantization_config
+from integrations.qdrant.types import (
+    QdrantException,
+    QdrantHNSWConfig,
+    QdrantPaginationResult,
+    QdrantPaginationToken,
+    QdrantPointIdentifier,
+    QdrantQuantization,
+    QdrantRecord,
+    QdrantSparseVector,
+)
 
 __all__ = [
     "QdrantStoreMixin",
@@ -27,26 +58,76 @@ class QdrantStoreMixin(QdrantSession):
         current_collections: CollectionsResponse = await self._client.get_collections()
         return tuple(collection.name for collection in current_collections.collections)
 
-    async def create_collection[Model: DataModel](
+    async def create_collection[Model: DataModel](  # noqa: PLR0913
         self,
         model: type[Model],
         /,
         *,
         vector_size: int,
         in_ram: bool,
+        hnsw: QdrantHNSWConfig | None,
+        quantization: QdrantQuantization | None,
+        sparse_vectors: bool,
         skip_existing: bool,
     ) -> bool:
         if skip_existing and await self._client.collection_exists(collection_name=model.__name__):
-            return False
+            collection: CollectionInfo = await self._client.get_collection(
+                collection_name=model.__name__
+            )
+            # existing collection has to match the layout and the size of produced
+            # (possibly truncated) vectors
+            match collection.config.params.vectors:
+                case VectorParams() if sparse_vectors:
+                    raise QdrantException(
+                        f"Collection {model.__name__} uses unnamed vectors,"
+                        " expected named vectors for hybrid search"
+                    )
+
+                case dict() if not sparse_vectors:
+                    raise QdrantException(
+                        f"Collection {model.__name__} uses named vectors,"
+                        " expected an unnamed vector"
+                    )
+
+                case VectorParams(size=size) | {"dense": VectorParams(size=size)} if (
+                    size != vector_size
+                ):
+                    raise QdrantException(
+                        f"Collection {model.__name__} uses vector size {size},"
+                        f" expected {vector_size}"
+                    )
+
+                case _:
+                    return False
+
+        self._dense_vectors.pop(model.__name__, None)
+        vector_params: VectorParams = VectorParams(
+            size=vector_size,
+            distance=Distance.COSINE,
+            on_disk=not in_ram,
+        )
+        if sparse_vectors:
+            # named dense and sparse vectors allow hybrid search within a single collection
+            return await self._client.create_collection(
+                collection_name=model.__name__,
+                vectors_config={DENSE_VECTOR: vector_params},
+                sparse_vectors_config={
+                    SPARSE_VECTOR: SparseVectorParams(
+                        index=SparseIndexParams(on_disk=not in_ram),
+                        modifier=Modifier.IDF,
+                    ),
+                },
+                on_disk_payload=not in_ram,
+                hnsw_config=prepare_hnsw_config(hnsw),
+                quantization_config=prepare_quantization_config(quantization),
+            )
 
         return await self._client.create_collection(
             collection_name=model.__name__,
-            vectors_config=VectorParams(
-                size=vector_size,
-                distance=Distance.COSINE,
-                on_disk=not in_ram,
-            ),
+            vectors_config=vector_params,
             on_disk_payload=not in_ram,
+            hnsw_config=prepare_hnsw_config(hnsw),
+            quantization_config=prepare_quantization_config(quantization),
         )
 
     async def create_index[Model: DataModel, Attribute](
@@ -81,9 +162,10 @@ class QdrantStoreMixin(QdrantSession):
         model: type[Model],
         /,
     ) -> None:
+        self._dense_vectors.pop(model.__name__, None)
         await self._client.delete_collection(collection_name=model.__name__)
 
-    async def fetch[Model: DataModel](
+    async def fetch[Model: DataModel](  # noqa: PLR0913
         self,
         model: type[Model],
         /,
@@ -91,8 +173,14 @@ class QdrantStoreMixin(QdrantSession):
         requirements: AttributeRequirement[Model] | None,
         continuation: QdrantPaginationToken | None,
         limit: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
         return_vector: bool,
-    ) -> QdrantPaginationResult[Embedded[Model]] | QdrantPaginationResult[Model]:
+    ) -> (
+        QdrantPaginationResult[Embedded[Model]]
+        | QdrantPaginationResult[Model]
+        | QdrantPaginationResult[QdrantRecord[Model]]
+    ):
         records, next_point_id = await self._client.scroll(  # pyright: ignore[reportUnknownMemberType]
             collection_name=model.__name__,
             scroll_filter=prepare_filter(
@@ -100,7 +188,11 @@ class QdrantStoreMixin(QdrantSession):
             ),
             limit=limit,
             offset=continuation.next_id if continuation else None,
-            with_payload=True,
+            with_payload=prepare_payload_selector(
+                include=include,
+                exclude=exclude,
+            ),
+            with_vectors=return_vector,
         )
 
         continuation_token: QdrantPaginationToken | None
@@ -110,13 +202,25 @@ class QdrantStoreMixin(QdrantSession):
         else:
             continuation_token = None
 
-        if return_vector:
+        if include is not None or exclude is not None:
+            # projected payloads are decoded lazily, only when accessed
+            return QdrantPaginationResult[QdrantRecord[model]](
+                results=[
+                    QdrantRecord.of(
+                        model,
+                        data=record,
+                    )
+                    for record in records
+                ],
+                continuation_token=continuation_token,
+            )
+
+        elif return_vector:
             return QdrantPaginationResult[Embedded[model]](
                 results=[
                     Embedded[model](
                         value=model.from_mapping(record.payload),
-                        # we ar using only a single vector
-                        vector=cast(list[float], record.vector),
+                        vector=_dense_vector(record.vector),
                     )
                     for record in records
                     if record.payload
@@ -134,31 +238,200 @@ class QdrantStoreMixin(QdrantSession):
                 continuation_token=continuation_token,
             )
 
-    async def store[Model: DataModel](
+    async def iterate[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        requirements: AttributeRequirement[Model] | None,
+        batch_size: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
+        return_vector: bool,
+    ) -> AsyncIterator[QdrantRecord[Model]]:
+        scroll_filter: Filter | None = prepare_filter(
+            requirements=requirements,
+        )
+        payload_selector: PayloadSelector | bool = prepare_payload_selector(
+            include=include,
+            exclude=exclude,
+        )
+
+        def scroll(
+            offset: ExtendedPointId | None,
+        ) -> Task[tuple[list[Record], ExtendedPointId | None]]:
+            return create_task(
+                self._client.scroll(  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+                    collection_name=model.__name__,
+                    scroll_filter=scroll_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=payload_selector,
+                    with_vectors=return_vector,
+                )
+            )
+
+        # the next page is requested while the current one is consumed,
+        # at most two pages are kept in memory
+        next_page: Task[tuple[list[Record], ExtendedPointId | None]] = scroll(None)
+        try:
+            while True:
+                records, next_offset = await next_page
+                if next_offset is not None:
+                    next_page = scroll(next_offset)
+
+                for record in records:
+                    yield QdrantRecord.of(
+                        model,
+                        data=record,
+                    )
+
+                if next_offset is None:
+                    return  # all pages consumed
+
+        finally:
+            next_page.cancel()
+
+    async def store[Model: DataModel](  # noqa: PLR0913
         self,
         model: type[Model],
         /,
         *,
-        objects: Iterable[Embedded[Model]],
+        objects: Iterable[Embedded[Model]] | AsyncIterable[Embedded[Model]],
         batch_size: int,
         max_retries: int,
         parallel_tasks: int,
+        progress: Callable[[int], None] | None,
+        identifier: QdrantPointIdentifier[Model] | None,
+        sparse_vector: Callable[[Model], QdrantSparseVector] | None,
+        skip_unchanged: bool,
     ) -> None:
-        self._client.upload_points(
-            collection_name=model.__name__,
-            points=[
-                PointStruct(
-                    id=uuid4().hex,
-                    payload=dict(element.value.to_mapping()),
-                    vector=as_list(element.vector),
+        assert batch_size > 0  # nosec: B101
+        assert not skip_unchanged or identifier is not None  # nosec: B101
+        assert parallel_tasks > 0  # nosec: B101
+        uploads: set[Task[int]] = set()
+        stored: int = 0
+
+        async def finish_uploads(return_when: str) -> None:
+            nonlocal stored
+            done, _ = await wait(uploads, return_when=return_when)
+            for upload in done:
+                uploads.discard(upload)
+                stored += upload.result()
+
+            ctx.log_debug(f"Stored {stored} {model.__name__} points")
+            if progress is not None:
+                progress(stored)
+
+        try:
+            # objects are consumed lazily, only a bounded number of batches is kept in memory
+            async for points in _point_batches(
+                model,
+                objects,
+                batch_size=batch_size,
+                identifier=identifier,
+                sparse_vector=sparse_vector,
+            ):
+                if len(uploads) >= parallel_tasks:
+                    await finish_uploads(FIRST_COMPLETED)  # backpressure
+
+                uploads.add(
+                    create_task(
+                        self._upload_points(
+                            model,
+                            points,
+                            max_retries=max_retries,
+                            skip_unchanged=skip_unchanged,
+                        )
+                    )
                 )
-                for element in objects
-            ],
-            batch_size=batch_size,
-            max_retries=max_retries,
-            parallel=parallel_tasks,
+
+            if uploads:
+                await finish_uploads(ALL_COMPLETED)
+
+        finally:
+            for upload in uploads:
+                upload.cancel()
+
+        ctx.record_info(
+            metric="qdrant.store.points",
+            value=stored,
+            kind="counter",
+            attributes={"collection": model.__name__},
         )
 
+    async def _upload_points[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        points: Sequence[PointStruct],
+        /,
+        *,
+        max_retries: int,
+        skip_unchanged: bool,
+    ) -> int:
+        changed: Sequence[PointStruct] = points
+        if skip_unchanged:
+            changed = await self._changed_points(
+                model,
+                points,
+            )
+            ctx.record_info(
+                metric="qdrant.store.skipped",
+                value=len(points) - len(changed),
+                kind="counter",
+                attributes={"collection": model.__name__},
+            )
+            if not changed:
+                return len(points)  # nothing to upload
+
+        attempt: int = 0
+        while True:
+            try:
+                await self._client.upsert(
+                    collection_name=model.__name__,
+                    points=changed,
+                    wait=True,
+                )
+                return len(points)
+
+            except Exception as exc:
+                if attempt >= max_retries:
+                    raise QdrantException(
+                        f"Storing points in {model.__name__} failed: {exc}"
+                    ) from exc
+
+                attempt += 1
+                ctx.log_warning(
+                    f"Storing points in {model.__name__} failed, retrying ({attempt})...",
+                    exception=exc,
+                )
+                await sleep(0.2 * 2**attempt)  # exponential backoff
+
+    async def _changed_points[Model: DataModel](
+        self,
+        model: type[Model],
+        points: Sequence[PointStruct],
+        /,
+    ) -> Sequence[PointStruct]:
+        # only digests are downloaded, stored vectors and payloads are not compared directly
+        stored_digests: dict[UUID, Any] = {
+            UUID(str(record.id)): (record.payload or {}).get(_DIGEST_FIELD)
+            for record in await self._client.retrieve(
+                collection_name=model.__name__,
+                ids=[point.id for point in points],
+                with_payload=prepare_payload_selector(
+                    include=[_DIGEST_FIELD],
+                    exclude=None,
+                ),
+                with_vectors=False,
+            )
+        }
+        return [
+            point
+            for point in points
+            if stored_digests.get(UUID(str(point.id))) != (point.payload or {})[_DIGEST_FIELD]
+        ]
+
     async def delete[Model: DataModel](
         self,
         model: type[Model],
@@ -176,3 +449,140 @@ class QdrantStoreMixin(QdrantSession):
             ),
             wait=True,
         )
+
+
+async def _point_batches[Model: DataModel](
+    model: type[Model],
+    objects: Iterable[Embedded[Model]] | AsyncIterable[Embedded[Model]],
+    /,
+    *,
+    batch_size: int,
+    identifier: QdrantPointIdentifier[Model] | None,
+    sparse_vector: Callable[[Model], QdrantSparseVector] | None,
+) -> AsyncIterator[list[PointStruct]]:
+    points: list[PointStruct] = []
+    async for element in _iterate(objects):
+        payload: dict[str, Any] = dict(element.value.to_mapping())
+        vector: VectorStruct
+        if sparse_vector is not None:
+            sparse: QdrantSparseVector = sparse_vector(element.value)
+            vector = {
+                DENSE_VECTOR: as_list(element.vector),
+                SPARSE_VECTOR: SparseVector(
+                    indices=as_list(sparse.indices),
+                    values=as_list(sparse.values),
+                ),
+            }
+
+        else:
+            vector = as_list(element.vector)
+
+        point_id: str = _point_id(
+            model,
+            element.value,
+            payload=payload,
+            identifier=identifier,
+        )
+        # vectors change i.e. after switching embedding model or truncation
+        payload[_DIGEST_FIELD] = _point_digest(
+            payload,
+            vector=vector,
+        )
+        points.append(
+            PointStruct(
+                id=point_id,
+                payload=payload,
+                vector=vector,
+            )
+        )
+        if len(points) >= batch_size:
+            yield points
+            points = []
+
+    if points:
+        yield points
+
+
+def _point_id[Model: DataModel](
+    model: type[Model],
+    value: Model,
+    /,
+    *,
+    payload: Mapping[str, Any],
+    identifier: QdrantPointIdentifier[Model] | None,
+) -> str:
+    match identifier:
+        case None:
+            return uuid4().hex
+
+        case "content":
+            # the same content always gets the same id within a collection
+            content: str = json.dumps(
+                payload,
+                sort_keys=True,
+                separators=(",", ":"),
+                default=str,
+            )
+            return str(uuid5(NAMESPACE_URL, f"qdrant://{model.__name__}/content/{content}"))
+
+        case key:
+            return str(uuid5(NAMESPACE_URL, f"qdrant://{model.__name__}/key/{key(value)}"))
+
+
+def _dense_vector(
+    vector: Any,
+    /,
+) -> Sequence[float]:
+    match vector:
+        case {**vectors}:  # collections with sparse vectors use named vectors
+            return cast(list[float], vectors[DENSE_VECTOR])
+
+        case _:
+            return cast(list[float], vector)
+
+
+def _point_digest(
+    payload: Mapping[str, Any],
+    /,
+    *,
+    vector: VectorStruct,
+) -> str:
+    content: str = json.dumps(
+        {
+            "payload": payload,
+            "vector": vector,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_digest_value,
+    )
+    return blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def _digest_value(
+    value: Any,
+    /,
+) -> Any:
+    match value:
+        case SparseVector(indices=indices, values=values):
+            return {"indices": indices, "values": values}
+
+        case _:
+            return str(value)
+
+
+# payload field keeping the digest of stored payload and vectors, ignored when decoding models
+_DIGEST_FIELD: str = "_digest"
+
+
+async def _iterate[Element](
+    elements: Iterable[Element] | AsyncIterable[Element],
+    /,
+) -> AsyncIterator[Element]:
+    if isinstance(elements, AsyncIterable):
+        async for element in elements:
+            yield element
+
+    else:
+        for element in elements:
+            yield element
@@ -0,0 +1,100 @@
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CompressionRatio,
+    HnswConfigDiff,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+
+from integrations.qdrant.types import (
+    QdrantBinaryQuantization,
+    QdrantHNSWConfig,
+    QdrantProductQuantization,
+    QdrantQuantization,
+    QdrantScalarQuantization,
+    QdrantSearchConfig,
+)
+
+__all__ = [
+    "prepare_hnsw_config",
+    "prepare_quantization_config",
+    "prepare_search_params",
+]
+
+
+def prepare_hnsw_config(
+    config: QdrantHNSWConfig | None,
+    /,
+) -> HnswConfigDiff | None:
+    if config is None:
+        return None
+
+    return HnswConfigDiff(
+        m=config.m,
+        ef_construct=config.ef_construct,
+        on_disk=config.on_disk,
+    )
+
+
+def prepare_quantization_config(
+    config: QdrantQuantization | None,
+    /,
+) -> QuantizationConfig | None:
+    match config:
+        case None:
+            return None
+
+        case QdrantScalarQuantization():
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=config.quantile,
+                    always_ram=config.always_ram,
+                )
+            )
+
+        case QdrantProductQuantization():
+            return ProductQuantization(
+                product=ProductQuantizationConfig(
+                    compression=CompressionRatio(config.compression),
+                    always_ram=config.always_ram,
+                )
+            )
+
+        case QdrantBinaryQuantization():
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(
+                    always_ram=config.always_ram,
+                )
+            )
+
+
+def prepare_search_params(
+    config: QdrantSearchConfig,
+    /,
+) -> SearchParams | None:
+    quantization: QuantizationSearchParams | None
+    if config.oversampling is not None or config.rescore is not None:
+        quantization = QuantizationSearchParams(
+            oversampling=config.oversampling,
+            rescore=config.rescore,
+        )
+
+    else:
+        quantization = None
+
+    if config.ef is None and not config.exact and quantization is None:
+        return None  # use collection defaults
+
+    return SearchParams(
+        hnsw_ef=config.ef,
+        exact=config.exact,
+        quantization=quantization,
+    )
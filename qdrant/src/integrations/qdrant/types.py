@@ -1,21 +1,41 @@
-from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Mapping,
+    Sequence,
+)
 from typing import Any, Literal, Protocol, Self, runtime_checkable
 from uuid import UUID
 
 from draive import AttributePath, AttributeRequirement, DataModel, Embedded, State
 from qdrant_client.conversions.common_types import ScoredPoint
+from qdrant_client.models import Record
 
 __all__ = [
+    "QdrantBatchSearching",
+    "QdrantBinaryQuantization",
     "QdrantCollectionCreating",
     "QdrantCollectionDeleting",
     "QdrantCollectionIndexCreating",
     "QdrantDeleting",
     "QdrantException",
     "QdrantFetching",
+    "QdrantHNSWConfig",
+    "QdrantHybridSearching",
+    "QdrantIterating",
     "QdrantPaginationResult",
     "QdrantPaginationToken",
+    "QdrantPointIdentifier",
+    "QdrantProductQuantization",
+    "QdrantQuantization",
+    "QdrantRecord",
     "QdrantResult",
+    "QdrantScalarQuantization",
+    "QdrantSearchConfig",
     "QdrantSearching",
+    "QdrantSparseVector",
     "QdrantStoring",
 ]
 
@@ -36,29 +56,89 @@ class QdrantResult[Content: DataModel](State):
         if data.payload is None:
             raise ValueError("Missing qdrant data payload")
 
-        identifier: UUID
-        match data.id:
-            case int() as int_id:
-                identifier = UUID(int=int_id)
-
-            case str() as str_id:
-                identifier = UUID(hex=str_id)
-
         return cls(
-            identifier=identifier,
+            identifier=_identifier(data.id),
             vector=_flat_vector(data.vector),
             score=data.score,
             content=content.from_mapping(data.payload),
         )
 
 
+class QdrantRecord[Content: DataModel]:
+    __slots__ = (
+        "_content",
+        "_model",
+        "identifier",
+        "payload",
+        "score",
+        "vector",
+    )
+
+    @classmethod
+    def of(
+        cls,
+        content: type[Content],
+        /,
+        data: Record | ScoredPoint,
+    ) -> Self:
+        return cls(
+            content,
+            identifier=_identifier(data.id),
+            payload=data.payload or {},
+            vector=_flat_vector(data.vector) if data.vector is not None else None,
+            score=data.score if isinstance(data, ScoredPoint) else None,
+        )
+
+    def __init__(
+        self,
+        model: type[Content],
+        /,
+        *,
+        identifier: UUID,
+        payload: Mapping[str, Any],
+        vector: Mapping[str, Sequence[float]] | Sequence[float] | None,
+        score: float | None = None,
+    ) -> None:
+        self._model: type[Content] = model
+        self._content: Content | None = None
+        self.identifier: UUID = identifier
+        self.payload: Mapping[str, Any] = payload
+        self.vector: Mapping[str, Sequence[float]] | Sequence[float] | None = vector
+        self.score: float | None = score
+
+    @property
+    def content(self) -> Content:
+        # models are decoded only when accessed, projected payloads may not form a full model
+        if self._content is None:
+            self._content = self._model.from_mapping(self.payload)
+
+        return self._content
+
+
+def _identifier(
+    point_id: int | str,
+    /,
+) -> UUID:
+    match point_id:
+        case int() as int_id:
+            return UUID(int=int_id)
+
+        case str() as str_id:
+            return UUID(hex=str_id)
+
+
 def _flat_vector(
     vector: Any,
     /,
 ) -> Mapping[str, Sequence[float]] | Sequence[float]:
     match vector:
-        case {**vectors} if all(isinstance(item, float) for item in vectors.items()):
-            return dict(vectors)
+        case {**vectors}:
+            # named vectors, sparse vectors are not returned as dense sequences
+            return {
+                name: list(named_vector)
+                for name, named_vector in vectors.items()
+                if isinstance(named_vector, list)
+            }
 
         case [*vector] if all(isinstance(element, float) for element in vector):
             return list(vector)
@@ -74,11 +154,56 @@ class QdrantPaginationToken(State):
     next_id: Any
 
 
+# point ids derived from a key of each model or from its whole content
+type QdrantPointIdentifier[Model: DataModel] = (
+    AttributePath[Model, Any] | Callable[[Model], Any] | Literal["content"]
+)
+
+
 class QdrantPaginationResult[Result](State):
     results: Sequence[Result]
     continuation_token: QdrantPaginationToken | None
 
 
+class QdrantSparseVector(State):
+    indices: Sequence[int]
+    values: Sequence[float]
+
+
+class QdrantHNSWConfig(State):
+    m: int | None = None
+    ef_construct: int | None = None
+    # keep the index on disk instead of RAM, at the cost of search latency
+    on_disk: bool = False
+
+
+class QdrantScalarQuantization(State):
+    quantile: float | None = None
+    always_ram: bool = True
+
+
+class QdrantProductQuantization(State):
+    compression: Literal["x4", "x8", "x16", "x32", "x64"] = "x16"
+    always_ram: bool = True
+
+
+class QdrantBinaryQuantization(State):
+    always_ram: bool = True
+
+
+type QdrantQuantization = (
+    QdrantScalarQuantization | QdrantProductQuantization | QdrantBinaryQuantization
+)
+
+
+class QdrantSearchConfig(State):
+    ef: int | None = None
+    exact: bool = False
+    # quantized collections search more candidates and rescore them with original vectors
+    oversampling: float | None = None
+    rescore: bool | None = None
+
+
 @runtime_checkable
 class QdrantCollectionCreating(Protocol):
     async def __call__[Model: DataModel](
@@ -88,6 +213,9 @@ class QdrantCollectionCreating(Protocol):
         *,
         vector_size: int,
         in_ram: bool,
+        hnsw: QdrantHNSWConfig | None,
+        quantization: QdrantQuantization | None,
+        sparse_vectors: bool,
         skip_existing: bool,
     ) -> bool: ...
 
@@ -124,7 +252,7 @@ class QdrantCollectionDeleting(Protocol):
 
 @runtime_checkable
 class QdrantFetching(Protocol):
-    async def __call__[Model: DataModel](
+    async def __call__[Model: DataModel](  # noqa: PLR0913
         self,
         model: type[Model],
         /,
@@ -132,8 +260,29 @@ class QdrantFetching(Protocol):
         requirements: AttributeRequirement[Model] | None,
         continuation: QdrantPaginationToken | None,
         limit: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
         return_vector: bool,
-    ) -> QdrantPaginationResult[Embedded[Model]] | QdrantPaginationResult[Model]: ...
+    ) -> (
+        QdrantPaginationResult[Embedded[Model]]
+        | QdrantPaginationResult[Model]
+        | QdrantPaginationResult[QdrantRecord[Model]]
+    ): ...
+
+
+@runtime_checkable
+class QdrantIterating(Protocol):
+    def __call__[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        requirements: AttributeRequirement[Model] | None,
+        batch_size: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
+        return_vector: bool,
+    ) -> AsyncIterator[QdrantRecord[Model]]: ...
 
 
 @runtime_checkable
@@ -147,21 +296,59 @@ class QdrantSearching(Protocol):
         requirements: AttributeRequirement[Model] | None,
         score_threshold: float | None,
         limit: int,
+        include: Sequence[str] | None,
+        exclude: Sequence[str] | None,
+        return_vector: bool,
+    ) -> Sequence[QdrantResult[Model]] | Sequence[Model] | Sequence[QdrantRecord[Model]]: ...
+
+
+@runtime_checkable
+class QdrantHybridSearching(Protocol):
+    async def __call__[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        query_vector: Sequence[float],
+        query_sparse_vector: QdrantSparseVector | None,
+        requirements: AttributeRequirement[Model] | None,
+        score_threshold: float | None,
+        limit: int,
+        prefetch_limit: int | None,
         return_vector: bool,
     ) -> Sequence[QdrantResult[Model]] | Sequence[Model]: ...
 
 
+@runtime_checkable
+class QdrantBatchSearching(Protocol):
+    async def __call__[Model: DataModel](  # noqa: PLR0913
+        self,
+        model: type[Model],
+        /,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        requirements: AttributeRequirement[Model] | None,
+        score_threshold: float | None,
+        limit: int,
+        return_vector: bool,
+    ) -> Sequence[Sequence[QdrantResult[Model]]] | Sequence[Sequence[Model]]: ...
+
+
 @runtime_checkable
 class QdrantStoring(Protocol):
-    async def __call__[Model: DataModel](
+    async def __call__[Model: DataModel](  # noqa: PLR0913
         self,
         model: type[Model],
         /,
         *,
-        objects: Iterable[Embedded[Model]],
+        objects: Iterable[Embedded[Model]] | AsyncIterable[Embedded[Model]],
         batch_size: int,
         max_retries: int,
         parallel_tasks: int,
+        progress: Callable[[int], None] | None,
+        identifier: QdrantPointIdentifier[Model] | None,
+        sparse_vector: Callable[[Model], QdrantSparseVector] | None,
+        skip_unchanged: bool,
     ) -> None: ...
 
 
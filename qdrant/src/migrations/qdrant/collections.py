@@ -1,5 +1,6 @@
 from commons.model import ExampleData
 from integrations.qdrant import Qdrant
+from integrations.qdrant.config import QDRANT_VECTOR_SIZE
 
 __all__ = [
     "setup_qdrant_collections",
@@ -9,7 +10,7 @@ __all__ = [
 async def setup_qdrant_collections() -> None:
     await Qdrant.create_collection(
         ExampleData,
-        vector_size=1024,
+        vector_size=QDRANT_VECTOR_SIZE,
         in_ram=True,
         skip_existing=True,
     )
@@ -1,5 +1,7 @@
+from solutions.vector_index.cache import QueryEmbeddingCache
 from solutions.vector_index.qdrant import QdrantVectorIndex
 
 __all__ = [
     "QdrantVectorIndex",
+    "QueryEmbeddingCache",
 ]
@@ -0,0 +1,115 @@
+from asyncio import Task, create_task, shield
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from time import monotonic
+
+from draive import Embedded, TextEmbedding, ctx
+
+__all__ = [
+    "QueryEmbeddingCache",
+]
+
+
+class QueryEmbeddingCache:
+    __slots__ = (
+        "_config_key",
+        "_entries",
+        "_expiration",
+        "_limit",
+        "_pending",
+        "_single_flight",
+    )
+
+    def __init__(
+        self,
+        *,
+        config_key: Callable[[], Hashable],
+        limit: int = 1024,
+        expiration: float | None = 3600,
+        single_flight: bool = True,
+    ) -> None:
+        assert limit > 0  # nosec: B101
+        assert expiration is None or expiration > 0  # nosec: B101
+        self._limit: int = limit
+        self._expiration: float | None = expiration
+        self._single_flight: bool = single_flight
+        # vectors depend on the embedding provider config (i.e. model and dimensions)
+        # which lives in provider specific states, it has to be selected explicitly
+        self._config_key: Callable[[], Hashable] = config_key
+        self._entries: OrderedDict[Hashable, tuple[float, Sequence[float]]] = OrderedDict()
+        self._pending: dict[Hashable, Task[Sequence[float]]] = {}
+
+    async def embed(
+        self,
+        text: str,
+        /,
+    ) -> Sequence[float]:
+        # queries differing only in surrounding or repeated whitespace share the vector
+        normalized: str = " ".join(text.split())
+        key: Hashable = (
+            ctx.state(TextEmbedding).embedding,
+            self._config_key(),
+            normalized,
+        )
+        if (vector := self._cached(key)) is not None:
+            ctx.record_info(
+                metric="vector_index.query_cache.hits",
+                value=1,
+                kind="counter",
+            )
+            return vector
+
+        ctx.record_info(
+            metric="vector_index.query_cache.misses",
+            value=1,
+            kind="counter",
+        )
+        if not self._single_flight:
+            return await self._embed(key, normalized)
+
+        # concurrent identical queries wait for the same embedding call
+        task: Task[Sequence[float]] | None = self._pending.get(key)
+        if task is None:
+            task = create_task(self._embed(key, normalized))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        # cancelling one of waiting queries does not cancel the shared call
+        return await shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _embed(
+        self,
+        key: Hashable,
+        text: str,
+        /,
+    ) -> Sequence[float]:
+        embedded: Embedded[str] = await TextEmbedding.embed(text)
+        self._entries[key] = (
+            monotonic() + self._expiration if self._expiration is not None else float("inf"),
+            embedded.vector,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._limit:
+            self._entries.popitem(last=False)  # least recently used
+
+        return embedded.vector
+
+    def _cached(
+        self,
+        key: Hashable,
+        /,
+    ) -> Sequence[float] | None:
+        entry: tuple[float, Sequence[float]] | None = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, vector = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return vector
@@ -1,4 +1,4 @@
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from typing import Any, cast
 
 from draive import (
@@ -14,14 +14,35 @@ from draive import (
     mmr_vector_similarity_search,
 )
 
-from integrations.qdrant import Qdrant
+from integrations.qdrant import (
+    Qdrant,
+    QdrantResult,
+    QdrantSparseVector,
+    sparse_document_vector,
+    sparse_query_vector,
+)
+from integrations.qdrant.sparse import DENSE_VECTOR
+from solutions.vector_index.cache import QueryEmbeddingCache
 
 __all__ = [
     "QdrantVectorIndex",
 ]
 
 
-def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
+def QdrantVectorIndex(  # noqa: C901, PLR0915
+    *,
+    hybrid: bool = False,
+    query_cache: QueryEmbeddingCache | None = None,
+) -> VectorIndex:
+    # hybrid index requires collection created with sparse vectors,
+    # text values are then additionally matched by their terms
+    async def embed_query(text: str) -> Sequence[float]:
+        if query_cache is not None:
+            return await query_cache.embed(text)
+
+        embedded_query: Embedded[str] = await TextEmbedding.embed(text)
+        return embedded_query.vector
+
     async def index[Model: DataModel, Value: ResourceContent | TextContent | str](
         model: type[Model],
         /,
@@ -71,8 +92,20 @@ def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
         else:
             raise ValueError("Selected attribute values have to be the same type")
 
+        def sparse_vector(value: Model) -> QdrantSparseVector:
+            match value_selector(value):
+                case str() as text:
+                    return sparse_document_vector(text)
+
+                case TextContent() as text_content:
+                    return sparse_document_vector(text_content.text)
+
+                case _:  # other values are matched only by their dense vectors
+                    return QdrantSparseVector(indices=(), values=())
+
         await Qdrant.store(
             model,
+            sparse_vector=sparse_vector if hybrid else None,
             objects=[
                 Embedded(
                     value=value,
@@ -98,6 +131,7 @@ def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
     ) -> Sequence[Model]:
         assert query is not None or (query is None and score_threshold is None)  # nosec: B101
         query_vector: Sequence[float]
+        query_text: str | None = None
         match query:
             case None:
                 results = await Qdrant.fetch(
@@ -108,12 +142,12 @@ def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
                 return results.results
 
             case str() as text:
-                embedded_query: Embedded[str] = await TextEmbedding.embed(text)
-                query_vector = embedded_query.vector
+                query_vector = await embed_query(text)
+                query_text = text
 
             case TextContent() as text_content:
-                embedded_query: Embedded[str] = await TextEmbedding.embed(text_content.text)
-                query_vector = embedded_query.vector
+                query_vector = await embed_query(text_content.text)
+                query_text = text_content.text
 
             case ResourceContent() as resource_content:
                 if not resource_content.mime_type.startswith("image"):
@@ -128,12 +162,22 @@ def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
             case vector:
                 query_vector = vector
 
-        matching: Sequence[Embedded[Model]] = [
-            Embedded(
-                value=result.content,
-                vector=cast(Sequence[float], result.vector),
+        search_results: Sequence[QdrantResult[Model]]
+        if hybrid:
+            search_results = await Qdrant.search_hybrid(
+                model,
+                query_vector=query_vector,
+                query_sparse_vector=(
+                    sparse_query_vector(query_text) if query_text is not None else None
+                ),
+                requirements=requirements,
+                score_threshold=score_threshold,
+                limit=limit or 8,
+                return_vector=True,
             )
-            for result in await Qdrant.search(
+
+        else:
+            search_results = await Qdrant.search(
                 model,
                 query_vector=query_vector,
                 requirements=requirements,
@@ -141,6 +185,17 @@ def QdrantVectorIndex() -> VectorIndex:  # noqa: C901
                 limit=limit or 8,
                 return_vector=True,
             )
+
+        matching: Sequence[Embedded[Model]] = [
+            Embedded(
+                value=result.content,
+                vector=(
+                    result.vector[DENSE_VECTOR]
+                    if isinstance(result.vector, Mapping)
+                    else result.vector
+                ),
+            )
+            for result in search_results
         ]
 
         if not rerank: